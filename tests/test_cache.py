@@ -0,0 +1,119 @@
+""" unit tests for cache.py """
+
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+from variant_tool.cache import ResponseCache, cache_lifetime
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        # Create a fresh cache database for every test
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.cache = ResponseCache(os.path.join(tmp_dir.name, "cache.sqlite"), expire_after=60)
+        self.addCleanup(self.cache.close)
+
+    def test_set_then_get(self):
+        # Test that a stored body is returned for the same key
+        self.cache.set("https://example.org/a", b'{"a": 1}')
+        self.assertEqual(self.cache.get("https://example.org/a"), b'{"a": 1}')
+
+    def test_missing_key(self):
+        # Test that an unknown key is a cache miss
+        self.assertIsNone(self.cache.get("https://example.org/missing"))
+
+    def test_expired_entry_is_miss(self):
+        # Test that entries older than expire_after are not returned
+        with patch('variant_tool.cache.time.time', return_value=1000.0):
+            self.cache.set("https://example.org/a", b"{}")
+        with patch('variant_tool.cache.time.time', return_value=1061.0):
+            self.assertIsNone(self.cache.get("https://example.org/a"))
+
+    def test_expired_entry_keeps_validators(self):
+        # Test that an expired entry can still be looked up with its ETag/Last-Modified for revalidation
+        with patch('variant_tool.cache.time.time', return_value=1000.0):
+            self.cache.set("https://example.org/a", b"{}", etag='"v1"', last_modified="Tue, 01 Apr 2025 00:00:00 GMT")
+        with patch('variant_tool.cache.time.time', return_value=1061.0):
+            entry = self.cache.lookup("https://example.org/a")
+            self.assertFalse(entry.fresh)
+            self.assertEqual(entry.conditional_headers(), {
+                'If-None-Match': '"v1"',
+                'If-Modified-Since': "Tue, 01 Apr 2025 00:00:00 GMT"
+            })
+            self.cache.revalidated("https://example.org/a")
+            self.assertEqual(self.cache.get("https://example.org/a"), b"{}")
+
+    def test_upgrades_old_schema(self):
+        # Test that a database written before validators were stored is upgraded in place
+        path = os.path.join(os.path.dirname(self.cache.path), "old.sqlite")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE responses (key TEXT PRIMARY KEY, body BLOB NOT NULL, created REAL NOT NULL)")
+        conn.execute("INSERT INTO responses VALUES (?, ?, ?)", ("https://example.org/a", b"{}", time.time()))
+        conn.commit()
+        conn.close()
+        cache = ResponseCache(path, memory_size=0)
+        self.addCleanup(cache.close)
+        self.assertEqual(cache.get("https://example.org/a"), b"{}")
+        cache.set("https://example.org/b", b"{}", etag='"v2"')
+        self.assertEqual(cache.lookup("https://example.org/b").etag, '"v2"')
+
+    def test_cache_lifetime(self):
+        # Test that Cache-Control directives are read into (store, max_age)
+        self.assertEqual(cache_lifetime(None), (True, None))
+        self.assertEqual(cache_lifetime("public, max-age=300"), (True, 300))
+        self.assertEqual(cache_lifetime("no-cache, max-age=300"), (True, 0))
+        self.assertEqual(cache_lifetime("No-Store"), (False, None))
+        self.assertEqual(cache_lifetime("max-age=soon"), (True, None))
+
+    def test_store_response_honours_max_age(self):
+        # Test that a server max-age shorter than the default expiry is respected
+        response = Mock(content=b"{}", headers={'Cache-Control': "max-age=10", 'ETag': '"v1"'})
+        with patch('variant_tool.cache.time.time', return_value=1000.0):
+            self.cache.store_response("https://example.org/a", response)
+        with patch('variant_tool.cache.time.time', return_value=1009.0):
+            self.assertEqual(self.cache.get("https://example.org/a"), b"{}")
+        with patch('variant_tool.cache.time.time', return_value=1011.0):
+            self.assertIsNone(self.cache.get("https://example.org/a"))
+            self.assertEqual(self.cache.lookup("https://example.org/a").etag, '"v1"')
+
+    def test_store_response_no_store(self):
+        # Test that a no-store response is not cached and evicts an older copy
+        self.cache.set("https://example.org/a", b"old")
+        self.cache.store_response("https://example.org/a", Mock(content=b"new", headers={'Cache-Control': "no-store"}))
+        self.assertIsNone(self.cache.lookup("https://example.org/a"))
+
+    def test_store_response_no_cache_always_revalidates(self):
+        # Test that a no-cache response is kept for revalidation but never served as fresh
+        self.cache.store_response("https://example.org/a", Mock(content=b"{}", headers={'Cache-Control': "no-cache"}))
+        self.assertIsNone(self.cache.get("https://example.org/a"))
+        self.assertEqual(self.cache.lookup("https://example.org/a").body, b"{}")
+
+    def test_delete(self):
+        # Test that a deleted entry is no longer returned
+        self.cache.set("https://example.org/a", b"{}")
+        self.cache.delete("https://example.org/a")
+        self.assertIsNone(self.cache.get("https://example.org/a"))
+
+    def test_unwritable_path_is_miss(self):
+        # Test that a cache that cannot be opened degrades to misses instead of raising
+        cache = ResponseCache(os.path.join("/nonexistent-dir", "cache.sqlite"), memory_size=0)
+        cache.set("https://example.org/a", b"{}")
+        self.assertIsNone(cache.get("https://example.org/a"))
+
+    def test_memory_layer_serves_without_disk(self):
+        # Test that recent entries are still served from memory when SQLite is unavailable
+        cache = ResponseCache(os.path.join("/nonexistent-dir", "cache.sqlite"), memory_size=1)
+        cache.set("https://example.org/a", b"a")
+        self.assertEqual(cache.get("https://example.org/a"), b"a")
+        cache.set("https://example.org/b", b"b")  # Evicts the least recently used entry
+        self.assertIsNone(cache.get("https://example.org/a"))
+        self.assertEqual(cache.get("https://example.org/b"), b"b")
+
+
+if __name__ == '__main__':
+    unittest.main()
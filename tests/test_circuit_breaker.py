@@ -0,0 +1,90 @@
+""" unit tests for circuit_breaker.py """
+
+import unittest
+from unittest.mock import Mock
+import requests
+from variant_tool.circuit_breaker import CircuitBreaker, CircuitOpenError, is_outage
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker("example.org", threshold=3, reset_timeout=30, clock=self.clock)
+
+    def trip(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+
+    def test_opens_after_threshold(self):
+        # Test that the breaker only opens once the threshold of consecutive failures is reached
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+        self.assertFalse(self.breaker.allow())
+        self.assertRaises(CircuitOpenError, self.breaker.check)
+
+    def test_success_resets_count(self):
+        # Test that a success in between failures starts the count again
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_single_probe_after_reset_timeout(self):
+        # Test that one probe is let through after the reset timeout and a success closes the breaker
+        self.trip()
+        self.clock.now = 30
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())  # Probe still in flight
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_failed_probe_reopens(self):
+        # Test that a failed probe re-opens the breaker for another full reset timeout
+        self.trip()
+        self.clock.now = 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+        self.clock.now = 59
+        self.assertFalse(self.breaker.allow())
+
+    def test_lost_probe_is_replaced(self):
+        # Test that a probe which never reports back does not leave the breaker half-open for good
+        self.trip()
+        self.clock.now = 30
+        self.assertTrue(self.breaker.allow())  # Probe sent, but its result is never recorded
+        self.clock.now = 59
+        self.assertFalse(self.breaker.allow())
+        self.clock.now = 60
+        self.assertTrue(self.breaker.allow())  # Replacement probe after probe_timeout
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_is_outage(self):
+        # Test that only timeouts, connection errors and 5xx responses count as outages
+        server_error = requests.exceptions.HTTPError(response=Mock(status_code=503))
+        client_error = requests.exceptions.HTTPError(response=Mock(status_code=400))
+        self.assertTrue(is_outage(requests.exceptions.Timeout()))
+        self.assertTrue(is_outage(requests.exceptions.ConnectionError()))
+        self.assertTrue(is_outage(server_error))
+        self.assertFalse(is_outage(client_error))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+""" unit tests for logcontext.py """
+
+import logging
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from variant_tool.logcontext import CURRENT_VARIANT, VariantFilter, bind_variant, submit_in_context
+
+
+def make_record():
+    return logging.LogRecord("test", logging.INFO, __file__, 1, "message", None, None)
+
+
+class TestLogContext(unittest.TestCase):
+
+    def test_bind_variant_restores_previous(self):
+        # Test that the variant is only bound inside the with-block, including when nested
+        self.assertEqual(CURRENT_VARIANT.get(), '-')
+        with bind_variant("NM_000518.5:c.92+1G>A"):
+            with bind_variant("NM_007294.4:c.5266dupC"):
+                self.assertEqual(CURRENT_VARIANT.get(), "NM_007294.4:c.5266dupC")
+            self.assertEqual(CURRENT_VARIANT.get(), "NM_000518.5:c.92+1G>A")
+        self.assertEqual(CURRENT_VARIANT.get(), '-')
+
+    def test_filter_tags_record(self):
+        # Test that the filter copies the bound variant onto the record and keeps it
+        log_filter = VariantFilter()
+        record = make_record()
+        self.assertTrue(log_filter.filter(record))
+        self.assertEqual(record.variant, '-')
+        with bind_variant("NM_000518.5:c.92+1G>A"):
+            record = make_record()
+            log_filter.filter(record)
+        self.assertEqual(record.variant, "NM_000518.5:c.92+1G>A")
+
+    def test_submit_in_context_propagates_variant(self):
+        # Test that executor workers see the submitting thread's variant, and plain submits do not
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            with bind_variant("NM_000518.5:c.92+1G>A"):
+                propagated = submit_in_context(executor, CURRENT_VARIANT.get)
+                plain = executor.submit(CURRENT_VARIANT.get)
+            self.assertEqual(propagated.result(), "NM_000518.5:c.92+1G>A")
+            self.assertEqual(plain.result(), '-')
+
+
+if __name__ == '__main__':
+    unittest.main()
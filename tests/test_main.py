@@ -3,20 +3,52 @@
 import unittest
 from unittest.mock import patch, Mock
 import json
+import orjson
+import os
+import tempfile
+import threading
+import time
 import requests
-from variant_tool.clinvar import search_clinvar_by_hgvs
+from variant_tool import clinvar
+from variant_tool.main import print_report, read_batch_file, run_batch, run_pipeline
+from variant_tool.cache import ResponseCache
+from variant_tool.circuit_breaker import CircuitBreaker
+from variant_tool.ratelimit import TokenBucket
+from variant_tool.clinvar import (search_clinvar_by_hgvs, search_clinvar_many, esummary_many,
+                                  extract_classifications)
 
 
-class TestSearchClinvarByHgvs(unittest.TestCase):
+class ClinvarTestCase(unittest.TestCase):
+    """Isolates each test from the on-disk cache and the shared rate limiter."""
 
     def setUp(self):
+        # Point the ClinVar response cache at a throwaway database for each test
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        cache = ResponseCache(os.path.join(tmp_dir.name, "clinvar_cache.sqlite"))
+        self.addCleanup(cache.close)
+        cache_patcher = patch('variant_tool.clinvar._CACHE', cache)
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+        # Use a generous rate limit so the tests never sleep
+        bucket_patcher = patch('variant_tool.clinvar._BUCKET', TokenBucket(1000))
+        bucket_patcher.start()
+        self.addCleanup(bucket_patcher.stop)
+        # Start every test with a closed circuit breaker
+        breaker_patcher = patch('variant_tool.clinvar._BREAKER', CircuitBreaker("eutils.ncbi.nlm.nih.gov"))
+        breaker_patcher.start()
+        self.addCleanup(breaker_patcher.stop)
+        # Surface failures on the first attempt; the retry loop is tested in test_session
+        retries_patcher = patch('variant_tool.session.RETRIES', 0)
+        retries_patcher.start()
+        self.addCleanup(retries_patcher.stop)
+
         # Set up mock responses used across multiple tests
         # Mock successful search response with one result
         self.success_search_response = {
             "esearchresult": {
                 "count": "1",
-                "webenv": "NCID_1_123",
-                "querykey": "1"
+                "idlist": ["12345"]
             }
         }
         # Mock successful summary response with variant details
@@ -29,29 +61,74 @@ class TestSearchClinvarByHgvs(unittest.TestCase):
         # Mock search response with no results
         self.empty_search_response = {
             "esearchresult": {
-                "count": "0"
+                "count": "0",
+                "idlist": []
             }
         }
 
+    @staticmethod
+    def mock_response(payload):
+        """Builds a successful mock HTTP response carrying payload as its JSON body."""
+        response = Mock()
+        response.headers = {}  # No rate limit headers
+        response.status_code = 200  # Simulate successful HTTP response
+        response.content = json.dumps(payload).encode()
+        return response
+
+
+class TestSearchClinvarByHgvs(ClinvarTestCase):
+
     def test_valid_hgvs_variant_success(self):
         # Test successful API call with valid HGVS variant
-        with patch('requests.get') as mock_get:  # Mock the requests.get function
-            # Configure mock for search request
-            mock_search_response = Mock()
-            mock_search_response.status_code = 200  # Simulate successful HTTP response
-            mock_search_response.json.return_value = self.success_search_response
-            # Configure mock for summary request
-            mock_summary_response = Mock()
-            mock_summary_response.status_code = 200  # Simulate successful HTTP response
-            mock_summary_response.json.return_value = self.success_summary_response
-            # Simulate two API calls: search then summary
-            mock_get.side_effect = [mock_search_response, mock_summary_response]
+        with patch('variant_tool.session.SESSION.get') as mock_get, \
+                patch('variant_tool.session.SESSION.post') as mock_post:  # Mock the shared session
+            # eSearch goes out as a GET, eSummary as a POST
+            mock_get.return_value = self.mock_response(self.success_search_response)
+            mock_post.return_value = self.mock_response(self.success_summary_response)
 
             result = search_clinvar_by_hgvs("NM_000518.5:c.92+1G>A")  # Call function with valid input
             self.assertIsNotNone(result)  # Check that a result is returned
             self.assertIn("result", result)  # Verify result contains expected key
             self.assertEqual(result["result"]["uids"], ["12345"])  # Check specific data
             mock_get.assert_called()  # Ensure API was "called"
+            summary_params = mock_post.call_args.kwargs["data"]
+            self.assertEqual(summary_params["id"], "12345")  # eSummary is keyed on the eSearch UID
+            self.assertNotIn("WebEnv", summary_params)  # No history server token needed
+
+    def test_repeat_lookup_served_from_cache(self):
+        # Test that a second lookup of the same variant does not hit the network
+        with patch('variant_tool.session.SESSION.get') as mock_get, \
+                patch('variant_tool.session.SESSION.post') as mock_post:  # Mock the shared session
+            mock_get.return_value = self.mock_response(self.success_search_response)
+            mock_post.return_value = self.mock_response(self.success_summary_response)
+
+            first = search_clinvar_by_hgvs("NM_000518.5:c.92+1G>A")
+            second = search_clinvar_by_hgvs("NM_000518.5:c.92+1G>A")
+            self.assertEqual(first, second)  # Cached result matches the network result
+            self.assertEqual(mock_get.call_count + mock_post.call_count, 2)  # Only the first lookup made requests
+
+    def test_refresh_bypasses_cache(self):
+        # Test that refresh=True re-fetches even when the variant is cached
+        with patch('variant_tool.session.SESSION.get') as mock_get, \
+                patch('variant_tool.session.SESSION.post') as mock_post:  # Mock the shared session
+            mock_get.return_value = self.mock_response(self.success_search_response)
+            mock_post.return_value = self.mock_response(self.success_summary_response)
+
+            search_clinvar_by_hgvs("NM_000518.5:c.92+1G>A")
+            search_clinvar_by_hgvs("NM_000518.5:c.92+1G>A", refresh=True)
+            self.assertEqual(mock_get.call_count + mock_post.call_count, 4)  # Both lookups went to the network
+
+    def test_rate_limit_header_drains_bucket(self):
+        # Test that a nearly exhausted NCBI quota makes the client back off
+        with patch('variant_tool.session.SESSION.get') as mock_get, \
+                patch('variant_tool.clinvar._BUCKET') as mock_bucket:
+            mock_response = Mock()
+            mock_response.headers = {"X-RateLimit-Remaining": "1"}  # Quota nearly spent
+            mock_response.content = json.dumps(self.empty_search_response).encode()
+            mock_get.return_value = mock_response
+
+            search_clinvar_by_hgvs("NM_000518.5:c.92+1G>A")
+            mock_bucket.drain.assert_called_once()  # Bucket emptied to force a wait
 
     def test_empty_hgvs_variant(self):
         # Test input validation for empty or whitespace-only strings
@@ -69,12 +146,29 @@ class TestSearchClinvarByHgvs(unittest.TestCase):
         with self.assertRaises(ValueError):  # Expect ValueError to be raised
             search_clinvar_by_hgvs(None)  # None should fail
 
+    def test_malformed_hgvs_skips_network(self):
+        # Test that strings which cannot be HGVS are rejected without an API call
+        with patch('variant_tool.session.SESSION.get') as mock_get:
+            self.assertIsNone(search_clinvar_by_hgvs("BRCA1 c.68_69del"))  # Missing reference sequence
+            self.assertIsNone(search_clinvar_by_hgvs("NM_000518.5"))  # Missing coordinate part
+            mock_get.assert_not_called()
+
+    def test_gene_annotated_hgvs_is_searched(self):
+        # Test that the ClinVar naming style with a gene in parentheses still reaches eSearch
+        with patch('variant_tool.session.SESSION.get',
+                   return_value=self.mock_response(self.empty_search_response)) as mock_get:
+            self.assertIsNone(search_clinvar_by_hgvs("NM_000518.5(HBB):c.92+1G>A"))
+            mock_get.assert_called_once()
+        self.assertTrue(clinvar._is_searchable_hgvs("NM_000518.5(HBB):c.92+1G>A"))
+        self.assertFalse(clinvar._is_searchable_hgvs("NM_000518.5(HBB c.92+1G>A"))  # Unclosed annotation
+
     def test_no_results_found(self):
         # Test handling when no results are found in ClinVar
-        with patch('requests.get') as mock_get:  # Mock the requests.get function
+        with patch('variant_tool.session.SESSION.get') as mock_get:  # Mock the shared session's get method
             mock_response = Mock()
+            mock_response.headers = {}  # No rate limit headers
             mock_response.status_code = 200  # Simulate successful HTTP response
-            mock_response.json.return_value = self.empty_search_response  # No results
+            mock_response.content = json.dumps(self.empty_search_response).encode()  # No results
             mock_get.return_value = mock_response  # Return mock response
 
             result = search_clinvar_by_hgvs("NM_000518.5:c.9999G>T")  # Call with variant
@@ -83,38 +177,346 @@ class TestSearchClinvarByHgvs(unittest.TestCase):
 
     def test_request_timeout(self):
         # Test handling of request timeout
-        with patch('requests.get', side_effect=requests.exceptions.Timeout):  # Simulate timeout
+        with patch('variant_tool.session.SESSION.get', side_effect=requests.exceptions.Timeout):  # Simulate timeout
             with patch('builtins.print') as mock_print:  # Mock print to capture output
                 result = search_clinvar_by_hgvs("NM_000518.5:c.92+1G>A")  # Call function
                 self.assertIsNone(result)  # Expect None on timeout
-                mock_print.assert_called_once_with(
-                    "Request timed out after 10 seconds for HGVS variant: NM_000518.5:c.92+1G>A"
-                )  # Verify error message
+                mock_print.assert_not_called()  # Reporting is left to print_report
+
+    def test_open_circuit_skips_network(self):
+        # Test that repeated timeouts open the breaker and later lookups fail fast without a request
+        with patch('variant_tool.session.SESSION.get', side_effect=requests.exceptions.Timeout) as mock_get:
+            for _ in range(5):
+                self.assertIsNone(search_clinvar_by_hgvs("NM_000518.5:c.92+1G>A"))
+            self.assertEqual(mock_get.call_count, 5)
+            self.assertIsNone(search_clinvar_by_hgvs("NM_000518.5:c.92+1G>A"))
+            self.assertEqual(mock_get.call_count, 5)
+
+    def test_passed_deadline_skips_network(self):
+        # Test that an exhausted deadline fails the lookup without a request or tripping the breaker
+        with patch('variant_tool.session.SESSION.get') as mock_get:
+            self.assertIsNone(search_clinvar_by_hgvs("NM_000518.5:c.92+1G>A", deadline=time.monotonic() - 1))
+            mock_get.assert_not_called()
+        self.assertEqual(clinvar._BREAKER.state, "closed")
+
+    def test_cancelled_search_sends_nothing(self):
+        # Test that a search the caller has cancelled makes no request and is not reported as an error
+        cancelled = threading.Event()
+        cancelled.set()
+        with patch('variant_tool.session.SESSION.get') as mock_get, patch('builtins.print') as mock_print:
+            self.assertIsNone(search_clinvar_by_hgvs("NM_000518.5:c.92+1G>A", cancelled=cancelled))
+            mock_get.assert_not_called()
+            mock_print.assert_not_called()
+        self.assertEqual(clinvar._BREAKER.state, "closed")
+
+    def test_passed_deadline_does_not_take_probe(self):
+        # Test that a call with a spent budget leaves the half-open probe for the next real request
+        now = [0.0]
+        breaker = CircuitBreaker("eutils.ncbi.nlm.nih.gov", threshold=1, reset_timeout=30, clock=lambda: now[0])
+        breaker.record_failure()
+        now[0] = 31
+        with patch('variant_tool.clinvar._BREAKER', breaker), \
+                patch('variant_tool.session.SESSION.get',
+                      return_value=self.mock_response(self.empty_search_response)) as mock_get:
+            self.assertIsNone(search_clinvar_by_hgvs("NM_000518.5:c.92+1G>A", deadline=time.monotonic() - 1))
+            self.assertEqual(breaker.state, "open")
+            self.assertIsNone(search_clinvar_by_hgvs("NM_000518.5:c.92+1G>A"))
+            mock_get.assert_called_once()
+        self.assertEqual(breaker.state, "closed")
 
     def test_request_exception(self):
         # Test handling of general request exceptions
-        with patch('requests.get', side_effect=requests.exceptions.RequestException("Network Error")):  # Simulate error
+        with patch('variant_tool.session.SESSION.get', side_effect=requests.exceptions.RequestException("Network Error")):  # Simulate error
             with patch('builtins.print') as mock_print:  # Mock print to capture output
                 result = search_clinvar_by_hgvs("NM_000518.5:c.92+1G>A")  # Call function
                 self.assertIsNone(result)  # Expect None on error
-                mock_print.assert_called_once_with(
-                    "Error during ClinVar API request for HGVS variant 'NM_000518.5:c.92+1G>A': Network Error"
-                )  # Verify error message
+                mock_print.assert_not_called()  # Reporting is left to print_report
 
     def test_json_decode_error(self):
         # Test handling of JSON decode errors
-        with patch('requests.get') as mock_get:  # Mock the requests.get function
+        with patch('variant_tool.session.SESSION.get') as mock_get:  # Mock the shared session's get method
             mock_response = Mock()
+            mock_response.headers = {}  # No rate limit headers
             mock_response.status_code = 200  # Simulate successful HTTP response
-            mock_response.json.side_effect = json.JSONDecodeError("Invalid JSON", "", 0)  # Simulate JSON error
+            mock_response.content = b"Invalid JSON"
             mock_get.return_value = mock_response  # Return mock response
 
-            with patch('builtins.print') as mock_print:  # Mock print to capture output
+            with patch('variant_tool.clinvar.orjson.loads',
+                       side_effect=orjson.JSONDecodeError("Invalid JSON", "", 0)), \
+                    patch('builtins.print') as mock_print:  # Simulate JSON error and capture output
                 result = search_clinvar_by_hgvs("NM_000518.5:c.92+1G>A")  # Call function
                 self.assertIsNone(result)  # Expect None on JSON error
-                mock_print.assert_called_once_with(
-                    "Error decoding JSON response for HGVS variant 'NM_000518.5:c.92+1G>A': Invalid JSON: line 1 column 1 (char 0)"
-                )  # Verify full error message
+                mock_print.assert_not_called()  # Reporting is left to print_report
+
+
+class TestEutilsErrorBodies(ClinvarTestCase):
+
+    def test_error_body_raises_and_is_not_cached(self):
+        # Test that an HTTP 200 error body raises EutilsError and the next call asks again
+        backend_error = {"esearchresult": {"ERROR": "Search Backend failed: read request has timed out"}}
+        with patch('variant_tool.session.SESSION.get',
+                   side_effect=[self.mock_response(backend_error),
+                                self.mock_response(self.empty_search_response)]) as mock_get:
+            with self.assertRaises(clinvar.EutilsError):
+                clinvar.esearch_uid("NM_000518.5:c.92+1G>A")
+            self.assertIsNone(clinvar.esearch_uid("NM_000518.5:c.92+1G>A"))
+            self.assertEqual(mock_get.call_count, 2)
+
+    def test_missing_count_is_an_error(self):
+        # Test that an eSearch result without a count is treated as a failure, not a KeyError
+        with patch('variant_tool.session.SESSION.get',
+                   return_value=self.mock_response({"esearchresult": {"idlist": []}})):
+            with self.assertRaises(clinvar.EutilsError):
+                clinvar.esearch_uid("NM_000518.5:c.92+1G>A")
+
+
+class TestSearchClinvarMany(ClinvarTestCase):
+
+    def test_results_keep_input_order(self):
+        # Test that batch lookups return one result per variant, in input order
+        uids = {"NM_000518.5:c.92+1G>A": "15436", "NM_000314.4:c.850-2A>G": None, "NM_007294.4:c.68_69del": "17662"}
+
+        def fake_get(url, params, timeout, headers=None):
+            # Answer each eSearch with the UID for the variant in its term
+            variant = params["term"].split('"')[1]
+            uid = uids[variant]
+            return self.mock_response({"esearchresult": {"count": "1" if uid else "0", "idlist": [uid] if uid else []}})
+
+        summary = {"result": {"uids": ["15436", "17662"], "15436": {"title": "HBB"}, "17662": {"title": "BRCA1"}}}
+        with patch('variant_tool.session.SESSION.get', side_effect=fake_get), \
+                patch('variant_tool.session.SESSION.post', return_value=self.mock_response(summary)) as mock_post:
+            results = search_clinvar_many(list(uids), max_workers=2)
+
+        self.assertEqual(results[0], {"result": {"uids": ["15436"], "15436": {"title": "HBB"}}})
+        self.assertIsNone(results[1])  # No ClinVar match for the second variant
+        self.assertEqual(results[2], {"result": {"uids": ["17662"], "17662": {"title": "BRCA1"}}})
+        mock_post.assert_called_once()  # Both UIDs fetched in one eSummary request
+        self.assertEqual(mock_post.call_args.kwargs["data"]["id"], "15436,17662")
+
+    def test_error_body_fails_only_that_variant(self):
+        # Test that an HTTP 200 error body from eSearch fails one variant, not the whole batch
+        backend_error = {"esearchresult": {"ERROR": "Search Backend failed: read request has timed out"}}
+
+        def fake_get(url, params, timeout, headers=None):
+            if "NM_000314.4" in params["term"]:
+                return self.mock_response(backend_error)
+            return self.mock_response({"esearchresult": {"count": "1", "idlist": ["15436"]}})
+
+        summary = {"result": {"uids": ["15436"], "15436": {"title": "HBB"}}}
+        with patch('variant_tool.session.SESSION.get', side_effect=fake_get), \
+                patch('variant_tool.session.SESSION.post', return_value=self.mock_response(summary)):
+            results = search_clinvar_many(["NM_000518.5:c.92+1G>A", "NM_000314.4:c.850-2A>G"], max_workers=2)
+
+        self.assertEqual(results[0], {"result": {"uids": ["15436"], "15436": {"title": "HBB"}}})
+        self.assertIsNone(results[1])
+
+    def test_return_exceptions_reports_failures(self):
+        # Test that a failed lookup can be told apart from a variant with no ClinVar record
+        def fake_get(url, params, timeout, headers=None):
+            if "NM_000314.4" in params["term"]:
+                raise requests.exceptions.ConnectionError("Network Error")
+            return self.mock_response(self.empty_search_response)
+
+        with patch('variant_tool.session.SESSION.get', side_effect=fake_get), \
+                patch('variant_tool.session.SESSION.post') as mock_post:
+            results = search_clinvar_many(["NM_000518.5:c.92+1G>A", "NM_000314.4:c.850-2A>G"],
+                                          max_workers=2, return_exceptions=True)
+
+        self.assertIsNone(results[0])  # Not in ClinVar
+        self.assertIsInstance(results[1], requests.exceptions.ConnectionError)
+        mock_post.assert_not_called()  # No UIDs found, so no eSummary request
+
+    def test_passed_deadline_fails_batch_without_requests(self):
+        # Test that a spent batch deadline fails every lookup instead of sending requests
+        with patch('variant_tool.session.SESSION.get') as mock_get:
+            results = search_clinvar_many(["NM_000518.5:c.92+1G>A", "NM_000314.4:c.850-2A>G"],
+                                          return_exceptions=True, deadline=time.monotonic() - 1)
+            mock_get.assert_not_called()
+        self.assertTrue(all(isinstance(result, requests.exceptions.Timeout) for result in results))
+
+    def test_repeated_variants_share_one_search(self):
+        # Test that a batch repeating a variant sends one eSearch for it and checks each input once
+        summary = {"result": {"uids": ["15436"], "15436": {"title": "HBB"}}}
+        with patch('variant_tool.session.SESSION.get',
+                   return_value=self.mock_response({"esearchresult": {"count": "1", "idlist": ["15436"]}})) as mock_get, \
+                patch('variant_tool.session.SESSION.post', return_value=self.mock_response(summary)), \
+                self.assertLogs('variant_tool.clinvar', level='INFO') as logs:
+            results = search_clinvar_many(["NM_000518.5:c.92+1G>A", "not-hgvs", " NM_000518.5:c.92+1G>A"])
+
+        mock_get.assert_called_once()
+        self.assertEqual(results[0], results[2])
+        self.assertIsNone(results[1])
+        self.assertEqual(sum("Skipping" in line for line in logs.output), 1)
+
+    def test_malformed_body_fails_only_that_variant(self):
+        # Test that a well-formed reply with an odd count does not abort the rest of the batch
+        def fake_get(url, params, timeout, headers=None):
+            if "NM_000314.4" in params["term"]:
+                return self.mock_response({"esearchresult": {"count": "many", "idlist": ["1"]}})
+            return self.mock_response({"esearchresult": {"count": "1", "idlist": ["15436"]}})
+
+        summary = {"result": {"uids": ["15436"], "15436": {"title": "HBB"}}}
+        with patch('variant_tool.session.SESSION.get', side_effect=fake_get), \
+                patch('variant_tool.session.SESSION.post', return_value=self.mock_response(summary)):
+            results = search_clinvar_many(["NM_000518.5:c.92+1G>A", "NM_000314.4:c.850-2A>G"],
+                                          max_workers=2, return_exceptions=True)
+
+        self.assertEqual(results[0], {"result": {"uids": ["15436"], "15436": {"title": "HBB"}}})
+        self.assertIsInstance(results[1], ValueError)
+
+    def test_empty_variant_list(self):
+        # Test that an empty batch returns an empty list without any API calls
+        with patch('variant_tool.session.SESSION.get') as mock_get:
+            self.assertEqual(search_clinvar_many([]), [])
+            mock_get.assert_not_called()
+
+
+class TestEsummaryMany(ClinvarTestCase):
+
+    def test_chunks_of_200_are_merged(self):
+        # Test that more than 200 UIDs are split across requests and merged back together
+        uids = [str(n) for n in range(250)]
+
+        def fake_post(url, data, timeout, headers=None):
+            chunk = data["id"].split(",")
+            return self.mock_response({"result": {"uids": chunk, **{uid: {"uid": uid} for uid in chunk}}})
+
+        with patch('variant_tool.session.SESSION.post', side_effect=fake_post) as mock_post:
+            summary = esummary_many(uids)
+
+        self.assertEqual(mock_post.call_count, 2)  # ceil(250 / 200) requests
+        self.assertEqual(summary["result"]["uids"], uids)
+        self.assertEqual(summary["result"]["249"], {"uid": "249"})
+
+
+class TestExtractClassifications(unittest.TestCase):
+
+    def test_defaults_for_missing_fields(self):
+        # Test that missing classifications fall back to placeholder messages
+        result = extract_classifications({"title": "Variant Data"}, "12345")
+        self.assertEqual(result.uid, "12345")
+        self.assertEqual(result.germline_classification, "No germline classification available")
+        self.assertEqual(result.clinical_significance, {})
+
+    def test_non_dict_record_returns_none(self):
+        # Test that a malformed record is reported as a failed extraction
+        self.assertIsNone(extract_classifications(["not", "a", "record"], "12345"))
+
+    def test_blocks_are_the_records_own_dicts(self):
+        # Test that classification blocks are taken from the record as-is, not copied
+        record = {"germline_classification": {"description": "Pathogenic"}, "clinical_significance": {}}
+        result = extract_classifications(record, "15436")
+        self.assertIs(result.germline_classification, record["germline_classification"])
+        self.assertIs(result.clinical_significance, record["clinical_significance"])
+
+
+class TestRunPipeline(unittest.TestCase):
+
+    validation = {"flag": "gene_variant", "NM_000518.5:c.92+1G>A": {"gene_symbol": "HBB"}}
+    clinvar_results = {"result": {"uids": ["15436"], "15436": {"germline_classification": {"description": "Pathogenic"}}}}
+
+    def test_returns_classifications_without_console_io(self):
+        # Test that the pipeline can be driven directly, with no prompts or printing
+        with patch('variant_tool.main.validate_hgvs_variant', return_value=self.validation), \
+                patch('variant_tool.main.search_clinvar', return_value=self.clinvar_results), \
+                patch('builtins.input') as mock_input, patch('builtins.print') as mock_print:
+            result = run_pipeline("NM_000518.5:c.92+1G>A", "GRCH38")
+        mock_input.assert_not_called()
+        mock_print.assert_not_called()
+        self.assertEqual(result["gene_symbol"], "HBB")
+        self.assertEqual(result["classifications"].uid, "15436")
+        self.assertEqual(result["classifications"].germline_classification, {"description": "Pathogenic"})
+        self.assertIsNone(result["clinvar_error"])
+
+    def test_clinvar_failure_is_recorded_not_printed(self):
+        # Test that a failed ClinVar search is returned in the result for the caller to report
+        error = requests.exceptions.Timeout()
+        with patch('variant_tool.main.validate_hgvs_variant', return_value=self.validation), \
+                patch('variant_tool.main.search_clinvar', side_effect=error), \
+                patch('builtins.print') as mock_print:
+            result = run_pipeline("NM_000518.5:c.92+1G>A", "GRCH38")
+        mock_print.assert_not_called()
+        self.assertIs(result["clinvar_error"], error)
+        self.assertIsNone(result["clinvar_results"])
+
+    def test_report_shows_clinvar_failure(self):
+        # Test that print_report explains a failed search instead of claiming there is no record
+        result = {"gene_symbol": "HBB", "clinvar_results": None, "classifications": None,
+                  "clinvar_error": requests.exceptions.RequestException("Network Error")}
+        with patch('builtins.print') as mock_print:
+            print_report("NM_000518.5:c.92+1G>A", "GRCH38", result)
+        mock_print.assert_called_with(
+            "Error during ClinVar API request for HGVS variant 'NM_000518.5:c.92+1G>A': Network Error"
+        )
+
+    def test_invalid_variant_returns_none(self):
+        # Test that a variant rejected by VariantValidator gives None
+        with patch('variant_tool.main.validate_hgvs_variant', return_value=None), \
+                patch('variant_tool.main.search_clinvar', return_value=None):
+            self.assertIsNone(run_pipeline("NM_000518.5:c.92+1G>A", "GRCH38"))
+
+    def test_failed_validation_stops_clinvar_search(self):
+        # Test that the background ClinVar search is told to stop once validation has failed
+        stopped = []
+        finished = threading.Event()
+
+        def search(hgvs_variant, deadline=None, cancelled=None):
+            stopped.append(cancelled.wait(timeout=5))
+            finished.set()
+            return None
+
+        with patch('variant_tool.main.validate_hgvs_variant', return_value=None), \
+                patch('variant_tool.main.search_clinvar', side_effect=search):
+            self.assertIsNone(run_pipeline("NM_000518.5:c.92+1G>A", "GRCH38"))
+            self.assertTrue(finished.wait(timeout=5))
+        self.assertEqual(stopped, [True])
+
+    def test_no_clinvar_match(self):
+        # Test that a validated variant without a ClinVar record has no classifications
+        with patch('variant_tool.main.validate_hgvs_variant', return_value=self.validation), \
+                patch('variant_tool.main.search_clinvar', return_value=None):
+            result = run_pipeline("NM_000518.5:c.92+1G>A", "GRCH38")
+        self.assertIsNone(result["clinvar_results"])
+        self.assertIsNone(result["classifications"])
+
+    def test_invalid_genome_build(self):
+        # Test that bad inputs are rejected before any request is made
+        with patch('variant_tool.main.validate_hgvs_variant') as mock_validate:
+            with self.assertRaises(ValueError):
+                run_pipeline("NM_000518.5:c.92+1G>A", "HG19")
+            mock_validate.assert_not_called()
+
+    def test_batch_uses_batched_lookups(self):
+        # Test that batch mode validates and searches the whole batch at once, reporting in input order
+        variants = ["NM_000518.5:c.92+1G>A", "", "NM_000314.4:c.850-2A>G"]
+        with patch('variant_tool.main.validate_many', return_value=[self.validation, None]) as mock_validate, \
+                patch('variant_tool.main.search_clinvar_many', return_value=[self.clinvar_results, None]) as mock_search, \
+                patch('variant_tool.main.run_pipeline') as mock_pipeline, \
+                patch('variant_tool.main.pretty_print_results'), \
+                patch('builtins.print') as mock_print:
+            run_batch(variants, "GRCH38")
+        mock_pipeline.assert_not_called()
+        valid = ["NM_000518.5:c.92+1G>A", "NM_000314.4:c.850-2A>G"]
+        self.assertEqual(mock_validate.call_args.args[0], valid)
+        self.assertEqual(mock_search.call_args.args[0], valid)
+        # Both halves of the batch share one deadline
+        self.assertIsNotNone(mock_validate.call_args.kwargs["deadline"])
+        self.assertEqual(mock_search.call_args.kwargs["deadline"], mock_validate.call_args.kwargs["deadline"])
+        printed = [call.args[0] for call in mock_print.call_args_list]
+        self.assertEqual(
+            [line for line in printed if line.startswith("\n===")],
+            ["\n=== NM_000518.5:c.92+1G>A ===", "\n===  ===", "\n=== NM_000314.4:c.850-2A>G ==="],
+        )
+        self.assertIn("Input error: No HGVS variant provided", printed)
+        self.assertIn("Error: The entered variant 'NM_000314.4:c.850-2A>G' is not valid according to VariantValidator.",
+                      printed)
+
+    def test_read_batch_file(self):
+        # Test that blank lines and comments are skipped in a batch file
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as batch_file:
+            batch_file.write("NM_000518.5:c.92+1G>A\n\n# comment\n  NM_007294.4:c.68_69del  \n")
+        self.addCleanup(os.remove, batch_file.name)
+        self.assertEqual(read_batch_file(batch_file.name), ["NM_000518.5:c.92+1G>A", "NM_007294.4:c.68_69del"])
 
 
 if __name__ == '__main__':
@@ -14,19 +14,22 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import unittest
-from variant_tool.output import format_results, pretty_print_results
+from unittest.mock import patch
+from variant_tool.clinvar import Classifications
+from variant_tool.output import extract_gene_symbol, format_results, pretty_print_results
 
 class TestOutputFormatting(unittest.TestCase):
 
     def test_format_results_structure(self):
         """Test that format_results returns expected dictionary keys."""
         gene = "TP53"
-        classifications = {
-            "uid": "7890",
-            "germline_classification": {"description": "Pathogenic"},
-            "clinical_impact_classification": {"description": "Moderate"},
-            "oncogenicity_classification": {"description": "Likely oncogenic"}
-        }
+        classifications = Classifications(
+            uid="7890",
+            clinical_significance={},
+            germline_classification={"description": "Pathogenic"},
+            clinical_impact_classification={"description": "Moderate"},
+            oncogenicity_classification={"description": "Likely oncogenic"}
+        )
         result = format_results(gene, classifications)
         self.assertEqual(result["gene"], "TP53")
         self.assertIn("variant_uid", result)
@@ -45,18 +48,52 @@ class TestOutputFormatting(unittest.TestCase):
         }
         pretty_print_results(summary)  # Should not raise exceptions
 
+    def test_pretty_print_results_single_write(self):
+        """Test that the whole report is written to stdout in one call."""
+        summary = {
+            "gene": "HBB",
+            "variant_uid": "15436",
+            "germline": {"description": "Pathogenic"},
+            "clinical_impact": {},
+            "oncogenicity": None
+        }
+        with patch('sys.stdout') as stdout:
+            pretty_print_results(summary)
+        stdout.write.assert_called_once()
+        report = stdout.write.call_args[0][0]
+        self.assertIn("Gene: HBB\n", report)
+        self.assertIn("  Description               Pathogenic\n", report)
+        self.assertEqual(report.count("No data available."), 2)
+
     def test_format_results_sample(self):
         sample_gene = "HBB"
-        sample_classifications = {
-            "uid": "15436",
-            "germline_classification": {"description": "Pathogenic"},
-            "clinical_impact_classification": {},
-            "oncogenicity_classification": {}
-        }
+        sample_classifications = Classifications(
+            uid="15436",
+            clinical_significance={},
+            germline_classification={"description": "Pathogenic"},
+            clinical_impact_classification={},
+            oncogenicity_classification={}
+        )
         result = format_results(sample_gene, sample_classifications)
         assert result["gene"] == "HBB"
         assert result["variant_uid"] == "15436"
         assert "germline" in result
 
+    def test_extract_gene_symbol_standard_record(self):
+        """Test that the gene symbol is read from a standard validation record."""
+        validation = {"flag": "gene_variant", "NM_000518.5:c.92+1G>A": {"gene_symbol": "HBB"}}
+        self.assertEqual(extract_gene_symbol(validation), "HBB")
+
+    def test_extract_gene_symbol_warning_block(self):
+        """Test that the gene symbol is read from the validation warning block."""
+        validation = {"flag": "warning", "validation_warning_1": {"gene_symbol": "BRCA1"}, "metadata": {}}
+        self.assertEqual(extract_gene_symbol(validation), "BRCA1")
+
+    def test_extract_gene_symbol_missing(self):
+        """Test that None is returned when no record carries a gene symbol."""
+        self.assertIsNone(extract_gene_symbol({"flag": "intergenic", "metadata": {}}))
+        self.assertIsNone(extract_gene_symbol(None))
+        self.assertIsNone(extract_gene_symbol(["unexpected", "shape"]))
+
 if __name__ == '__main__':
     unittest.main()
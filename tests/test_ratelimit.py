@@ -0,0 +1,49 @@
+""" unit tests for ratelimit.py """
+
+import unittest
+from variant_tool.ratelimit import TokenBucket
+
+
+class FakeClock:
+    """Manually advanced clock; sleeping advances time instead of blocking."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(3, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_burst_up_to_rate_does_not_wait(self):
+        # Test that a full bucket allows `rate` requests immediately
+        for _ in range(3):
+            self.bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_waits_when_empty(self):
+        # Test that the fourth request within one second waits for a refill
+        for _ in range(4):
+            self.bucket.acquire()
+        self.assertAlmostEqual(sum(self.clock.sleeps), 1 / 3)
+
+    def test_drain_forces_wait(self):
+        # Test that draining the bucket makes the next request wait
+        self.bucket.drain()
+        with self.bucket:
+            pass
+        self.assertAlmostEqual(sum(self.clock.sleeps), 1 / 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
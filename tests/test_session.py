@@ -0,0 +1,142 @@
+""" unit tests for session.py """
+
+import socket
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+import requests
+from variant_tool.session import (SESSION, DeadlineExceeded, RequestCancelled, deadline_timeout, retry_wait,
+                                  send_with_retries)
+
+
+class TestSession(unittest.TestCase):
+
+    def test_https_adapter_enables_tcp_keepalive(self):
+        # Test that pooled HTTPS connections are created with SO_KEEPALIVE set
+        adapter = SESSION.get_adapter("https://rest.variantvalidator.org")
+        socket_options = adapter.poolmanager.connection_pool_kw["socket_options"]
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1), socket_options)
+
+    def test_adapter_does_not_retry(self):
+        # Test that urllib3 never re-sends on its own, outside the deadline-aware retry loop
+        retry = SESSION.get_adapter("https://eutils.ncbi.nlm.nih.gov").max_retries
+        self.assertEqual(retry.total, 0)
+
+    def test_default_headers(self):
+        # Test that every request asks for JSON and identifies the tool
+        self.assertEqual(SESSION.headers["Accept"], "application/json")
+        self.assertTrue(SESSION.headers["User-Agent"].startswith("variant-tool/"))
+
+    def test_accepts_compressed_responses(self):
+        # Test that the session negotiates gzip so large eSummary payloads are compressed on the wire
+        self.assertIn("gzip", SESSION.headers["Accept-Encoding"])
+
+
+def response(status_code, headers=None):
+    """Builds a mock HTTP response with the given status and headers."""
+    return Mock(status_code=status_code, headers=headers or {})
+
+
+class TestSendWithRetries(unittest.TestCase):
+
+    def setUp(self):
+        # Record waits instead of sleeping
+        sleep_patcher = patch('variant_tool.session.time.sleep')
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def test_retries_server_errors(self):
+        # Test that 5xx responses are retried with backoff until one succeeds
+        send = Mock(side_effect=[response(503), response(502), response(200)])
+        self.assertEqual(send_with_retries(send, (3.05, 10)).status_code, 200)
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_client_errors_not_retried(self):
+        # Test that a 4xx other than 429 is returned at once
+        send = Mock(return_value=response(404))
+        self.assertEqual(send_with_retries(send, (3.05, 10)).status_code, 404)
+        send.assert_called_once()
+
+    def test_gives_up_after_retries(self):
+        # Test that the last error is raised once the retries are used up
+        send = Mock(side_effect=requests.exceptions.ConnectionError)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            send_with_retries(send, (3.05, 10))
+        self.assertEqual(send.call_count, 4)  # First attempt plus three retries
+
+    def test_retry_after_is_capped(self):
+        # Test that a long Retry-After from the server is shortened rather than slept in full
+        self.assertEqual(retry_wait(0, response(429, {"Retry-After": "3600"})), 10)
+        self.assertEqual(retry_wait(0, response(429, {"Retry-After": "2"})), 2)
+        self.assertLessEqual(retry_wait(10), 10)  # Backoff is capped too
+        self.assertGreater(retry_wait(0), 0)  # Jittered backoff without Retry-After
+
+    def test_no_retry_past_deadline(self):
+        # Test that a retry whose wait would overrun the deadline is not made
+        send = Mock(return_value=response(503, {"Retry-After": "5"}))
+        result = send_with_retries(send, (3.05, 10), time.monotonic() + 1)
+        self.assertEqual(result.status_code, 503)
+        send.assert_called_once()
+        self.sleep.assert_not_called()
+
+    def test_attempt_timeout_capped_to_deadline(self):
+        # Test that every attempt gets at most what is left of the budget
+        send = Mock(side_effect=[requests.exceptions.ReadTimeout, response(200)])
+        send_with_retries(send, (3.05, 10), time.monotonic() + 5)
+        for call in send.call_args_list:
+            connect, read = call.args[0]
+            self.assertLessEqual(read, 5)
+
+    def test_passed_deadline_raises(self):
+        # Test that nothing is sent once the deadline has passed
+        send = Mock()
+        with self.assertRaises(DeadlineExceeded):
+            send_with_retries(send, (3.05, 10), time.monotonic() - 1)
+        send.assert_not_called()
+
+
+class TestCancellation(unittest.TestCase):
+
+    def test_cancelled_before_sending(self):
+        # Test that nothing is sent once the caller has cancelled
+        cancelled = threading.Event()
+        cancelled.set()
+        send = Mock()
+        with self.assertRaises(RequestCancelled):
+            send_with_retries(send, (3.05, 10), cancelled=cancelled)
+        send.assert_not_called()
+
+    def test_cancel_stops_retries(self):
+        # Test that cancelling during the backoff wait ends it early without another attempt
+        cancelled = threading.Event()
+        send = Mock(return_value=response(503, {"Retry-After": "5"}))
+        threading.Timer(0.05, cancelled.set).start()
+        started = time.monotonic()
+        with self.assertRaises(RequestCancelled):
+            send_with_retries(send, (3.05, 10), cancelled=cancelled)
+        self.assertLess(time.monotonic() - started, 2)
+        send.assert_called_once()
+
+
+class TestDeadlineTimeout(unittest.TestCase):
+
+    def test_no_deadline_keeps_timeout(self):
+        # Test that the per-request timeout is used unchanged without a deadline
+        self.assertEqual(deadline_timeout((3.05, 10)), (3.05, 10))
+
+    def test_timeout_capped_to_remaining_budget(self):
+        # Test that a near deadline shortens both the connect and read timeouts
+        connect, read = deadline_timeout((3.05, 10), time.monotonic() + 2)
+        self.assertLessEqual(connect, 2)
+        self.assertLessEqual(read, 2)
+
+    def test_passed_deadline_raises(self):
+        # Test that no request is attempted once the deadline has passed
+        with self.assertRaises(DeadlineExceeded):
+            deadline_timeout((3.05, 10), time.monotonic() - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
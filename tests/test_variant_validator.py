@@ -0,0 +1,278 @@
+""" unit tests for variant_validator.py """
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+import requests
+from variant_tool.cache import ResponseCache
+from variant_tool.circuit_breaker import CircuitBreaker
+from variant_tool.variant_validator import validate_hgvs_variant, validate_many, validate_variant_refseq
+
+VARIANT = "NM_000518.5:c.92+1G>A"
+REFSEQ_OK = {"flag": "gene_variant", "source": "refseq"}
+ENSEMBL_OK = {"flag": "gene_variant", "source": "ensembl"}
+ERROR = {"flag": "error"}
+
+
+def mock_response(content, status_code=200, headers=None):
+    """Builds a mock HTTP response carrying content as its raw body."""
+    response = Mock()
+    response.content = content
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+class TestValidateHgvsVariant(unittest.TestCase):
+
+    def setUp(self):
+        # Start every test with an empty validation memo
+        memo_patcher = patch('variant_tool.variant_validator._MEMO', OrderedDict())
+        memo_patcher.start()
+        self.addCleanup(memo_patcher.stop)
+
+    def test_prefers_refseq_when_both_succeed(self):
+        # Test that a valid RefSeq result wins even if Ensembl also validates
+        with patch('variant_tool.variant_validator.validate_variant_refseq', return_value=REFSEQ_OK), \
+                patch('variant_tool.variant_validator.validate_variant_ensembl', return_value=ENSEMBL_OK):
+            self.assertEqual(validate_hgvs_variant(VARIANT, "GRCh38"), REFSEQ_OK)
+
+    def test_falls_back_to_ensembl(self):
+        # Test that the Ensembl result is used when RefSeq flags an error
+        with patch('variant_tool.variant_validator.validate_variant_refseq', return_value=ERROR), \
+                patch('variant_tool.variant_validator.validate_variant_ensembl', return_value=ENSEMBL_OK):
+            self.assertEqual(validate_hgvs_variant(VARIANT, "GRCh38"), ENSEMBL_OK)
+
+    def test_both_fail(self):
+        # Test that None is returned when neither endpoint validates the variant
+        with patch('variant_tool.variant_validator.validate_variant_refseq', return_value=None), \
+                patch('variant_tool.variant_validator.validate_variant_ensembl', return_value=ERROR):
+            self.assertIsNone(validate_hgvs_variant(VARIANT, "GRCh38"))
+
+    def test_endpoints_run_concurrently(self):
+        # Test that Ensembl is already in flight while RefSeq is still waiting
+        ensembl_started = threading.Event()
+
+        def slow_refseq(variant, genome_build, deadline=None):
+            # Only returns once the Ensembl lookup has started in parallel
+            self.assertTrue(ensembl_started.wait(timeout=5))
+            return ERROR
+
+        def ensembl(variant, genome_build, deadline=None, cancelled=None):
+            ensembl_started.set()
+            return ENSEMBL_OK
+
+        with patch('variant_tool.variant_validator.validate_variant_refseq', side_effect=slow_refseq), \
+                patch('variant_tool.variant_validator.validate_variant_ensembl', side_effect=ensembl):
+            self.assertEqual(validate_hgvs_variant(VARIANT, "GRCh38"), ENSEMBL_OK)
+
+    def test_unneeded_ensembl_lookup_is_cancelled(self):
+        # Test that a running Ensembl lookup is told to stop once RefSeq has validated the variant
+        ensembl_cancelled = []
+
+        def ensembl(variant, genome_build, deadline=None, cancelled=None):
+            ensembl_cancelled.append(cancelled.wait(timeout=5))
+            return ENSEMBL_OK
+
+        with patch('variant_tool.variant_validator.validate_variant_refseq', return_value=REFSEQ_OK), \
+                patch('variant_tool.variant_validator.validate_variant_ensembl', side_effect=ensembl) as mock_ensembl:
+            self.assertEqual(validate_hgvs_variant(VARIANT, "GRCh38"), REFSEQ_OK)
+            if mock_ensembl.called:
+                # The lookup had already started: its cancelled event is set rather than left running
+                mock_ensembl.call_args.kwargs['cancelled'].wait(timeout=5)
+                self.assertTrue(mock_ensembl.call_args.kwargs['cancelled'].is_set())
+
+    def test_repeat_validation_is_memoized(self):
+        # Test that validating the same variant again does not repeat the lookups
+        with patch('variant_tool.variant_validator.validate_variant_refseq', return_value=REFSEQ_OK) as mock_refseq, \
+                patch('variant_tool.variant_validator.validate_variant_ensembl', return_value=ENSEMBL_OK):
+            self.assertEqual(validate_hgvs_variant(VARIANT, "GRCh38"), REFSEQ_OK)
+            self.assertEqual(validate_hgvs_variant(VARIANT, "GRCh38"), REFSEQ_OK)
+            mock_refseq.assert_called_once()
+            # A different genome build is a different lookup
+            validate_hgvs_variant(VARIANT, "GRCh37")
+            self.assertEqual(mock_refseq.call_count, 2)
+
+    def test_failures_are_not_memoized(self):
+        # Test that a failed validation is retried on the next call
+        with patch('variant_tool.variant_validator.validate_variant_refseq', side_effect=[None, REFSEQ_OK]), \
+                patch('variant_tool.variant_validator.validate_variant_ensembl', return_value=None):
+            self.assertIsNone(validate_hgvs_variant(VARIANT, "GRCh38"))
+            self.assertEqual(validate_hgvs_variant(VARIANT, "GRCh38"), REFSEQ_OK)
+
+    def test_concurrent_duplicates_share_one_lookup(self):
+        # Test that duplicate lookups started while the first is running wait for its result
+        release = threading.Event()
+
+        def slow_refseq(variant, genome_build, deadline=None):
+            release.wait(timeout=5)
+            return REFSEQ_OK
+
+        with patch('variant_tool.variant_validator.validate_variant_refseq', side_effect=slow_refseq) as mock_refseq, \
+                patch('variant_tool.variant_validator.validate_variant_ensembl', return_value=ENSEMBL_OK):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = [executor.submit(validate_hgvs_variant, VARIANT, "GRCh38") for _ in range(4)]
+                time.sleep(0.05)
+                release.set()
+                results = [future.result() for future in futures]
+        self.assertEqual(results, [REFSEQ_OK] * 4)
+        mock_refseq.assert_called_once()
+
+
+class TestValidateMany(unittest.TestCase):
+
+    def test_results_keep_input_order(self):
+        # Test that batch validation returns one result per variant, in input order
+        results = {"NM_000518.5:c.92+1G>A": REFSEQ_OK, "NM_000314.4:c.850-2A>G": None, "NM_007294.4:c.68_69del": ENSEMBL_OK}
+        with patch('variant_tool.variant_validator.validate_hgvs_variant',
+                   side_effect=lambda v, build, deadline=None: results[v]):
+            self.assertEqual(validate_many(list(results), "GRCh38", max_workers=2), list(results.values()))
+
+    def test_empty_variant_list(self):
+        # Test that an empty batch returns an empty list without any validation
+        with patch('variant_tool.variant_validator.validate_hgvs_variant') as mock_validate:
+            self.assertEqual(validate_many([], "GRCh38"), [])
+            mock_validate.assert_not_called()
+
+
+class TestValidatorCache(unittest.TestCase):
+
+    def setUp(self):
+        # Point the VariantValidator response cache at a throwaway database for each test
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        cache = ResponseCache(os.path.join(tmp_dir.name, "variantvalidator_cache.sqlite"))
+        self.addCleanup(cache.close)
+        cache_patcher = patch('variant_tool.variant_validator._CACHE', cache)
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+        # Start every test with a closed circuit breaker
+        self.breaker = CircuitBreaker("refseq")
+        breaker_patcher = patch('variant_tool.variant_validator._REFSEQ_BREAKER', self.breaker)
+        breaker_patcher.start()
+        self.addCleanup(breaker_patcher.stop)
+        # Surface failures on the first attempt; the retry loop is tested in test_session
+        retries_patcher = patch('variant_tool.session.RETRIES', 0)
+        retries_patcher.start()
+        self.addCleanup(retries_patcher.stop)
+
+    def test_repeat_validation_served_from_cache(self):
+        # Test that validating the same variant twice makes only one request
+        response = mock_response(json.dumps(REFSEQ_OK).encode())
+        with patch('variant_tool.session.SESSION.get', return_value=response) as mock_get:
+            self.assertEqual(validate_variant_refseq(VARIANT, "GRCh38"), REFSEQ_OK)
+            self.assertEqual(validate_variant_refseq(VARIANT, "GRCh38"), REFSEQ_OK)
+            mock_get.assert_called_once()
+
+    def test_failures_are_not_cached(self):
+        # Test that a failed request is retried on the next call instead of being memoized
+        response = mock_response(json.dumps(REFSEQ_OK).encode())
+        with patch('variant_tool.session.SESSION.get',
+                   side_effect=[requests.exceptions.Timeout, response]) as mock_get:
+            self.assertIsNone(validate_variant_refseq(VARIANT, "GRCh38"))
+            self.assertEqual(validate_variant_refseq(VARIANT, "GRCh38"), REFSEQ_OK)
+            self.assertEqual(mock_get.call_count, 2)
+
+    def test_request_url(self):
+        # Test that the RefSeq URL is built from the genome build and variant
+        response = mock_response(json.dumps(REFSEQ_OK).encode())
+        with patch('variant_tool.session.SESSION.get', return_value=response) as mock_get:
+            validate_variant_refseq(VARIANT, "GRCh38")
+        self.assertEqual(
+            mock_get.call_args.args[0],
+            "https://rest.variantvalidator.org/VariantValidator/variantvalidator/GRCh38/"
+            "NM_000518.5:c.92+1G>A/all?content-type=application%2Fjson"
+        )
+
+    def test_request_url_escapes_variant(self):
+        # Test that characters outside the readable HGVS set are percent-encoded in the URL path
+        response = mock_response(json.dumps(REFSEQ_OK).encode())
+        with patch('variant_tool.session.SESSION.get', return_value=response) as mock_get:
+            validate_variant_refseq("NM_000518.5:c.[92+1G>A;93G>C]", "GRCh38")
+        self.assertEqual(
+            mock_get.call_args.args[0],
+            "https://rest.variantvalidator.org/VariantValidator/variantvalidator/GRCh38/"
+            "NM_000518.5:c.%5B92+1G>A%3B93G>C%5D/all?content-type=application%2Fjson"
+        )
+
+    def test_invalid_json_returns_none(self):
+        # Test that an unparseable body is reported as a failure and not cached
+        response = mock_response(b"<html>not json</html>")
+        with patch('variant_tool.session.SESSION.get', return_value=response) as mock_get:
+            self.assertIsNone(validate_variant_refseq(VARIANT, "GRCh38"))
+            self.assertIsNone(validate_variant_refseq(VARIANT, "GRCh38"))
+            self.assertEqual(mock_get.call_count, 2)
+
+    def test_open_circuit_still_serves_cache(self):
+        # Test that an open breaker skips the network for new variants but not for cached ones
+        response = mock_response(json.dumps(REFSEQ_OK).encode())
+        with patch('variant_tool.session.SESSION.get', return_value=response):
+            validate_variant_refseq(VARIANT, "GRCh38")
+        for _ in range(5):
+            self.breaker.record_failure()
+        with patch('variant_tool.session.SESSION.get') as mock_get:
+            self.assertEqual(validate_variant_refseq(VARIANT, "GRCh38"), REFSEQ_OK)
+            self.assertIsNone(validate_variant_refseq("NM_000314.4:c.850-2A>G", "GRCh38"))
+            mock_get.assert_not_called()
+
+    def test_expired_entry_revalidated_with_etag(self):
+        # Test that an expired entry is revalidated and reused when the server answers 304
+        fresh = mock_response(json.dumps(REFSEQ_OK).encode(), headers={'ETag': '"v1"'})
+        not_modified = mock_response(b"", status_code=304)
+        with patch('variant_tool.cache.time.time', return_value=1000.0), \
+                patch('variant_tool.session.SESSION.get', return_value=fresh):
+            validate_variant_refseq(VARIANT, "GRCh38")
+        with patch('variant_tool.cache.time.time', return_value=1000.0 + 2 * 24 * 60 * 60), \
+                patch('variant_tool.session.SESSION.get', return_value=not_modified) as mock_get:
+            self.assertEqual(validate_variant_refseq(VARIANT, "GRCh38"), REFSEQ_OK)
+            self.assertEqual(mock_get.call_args.kwargs["headers"], {'If-None-Match': '"v1"'})
+            # The 304 restarted the expiry, so the next lookup is served without a request
+            self.assertEqual(validate_variant_refseq(VARIANT, "GRCh38"), REFSEQ_OK)
+            mock_get.assert_called_once()
+
+    def test_passed_deadline_does_not_take_probe(self):
+        # Test that a call with a spent budget leaves the half-open probe for the next real request
+        now = [0.0]
+        breaker = CircuitBreaker("refseq", threshold=1, reset_timeout=30, clock=lambda: now[0])
+        breaker.record_failure()
+        now[0] = 31
+        response = mock_response(json.dumps(REFSEQ_OK).encode())
+        with patch('variant_tool.variant_validator._REFSEQ_BREAKER', breaker), \
+                patch('variant_tool.session.SESSION.get', return_value=response) as mock_get:
+            self.assertIsNone(validate_variant_refseq(VARIANT, "GRCh38", deadline=time.monotonic() - 1))
+            self.assertEqual(breaker.state, 'open')
+            self.assertEqual(validate_variant_refseq(VARIANT, "GRCh38"), REFSEQ_OK)
+            mock_get.assert_called_once()
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_requests_limited_per_endpoint(self):
+        # Test that concurrent validations never have more requests in flight than the endpoint's slots
+        lock = threading.Lock()
+        in_flight = [0, 0]  # current, peak
+
+        def slow_get(url, timeout, headers=None):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight[1], in_flight[0])
+            time.sleep(0.02)
+            with lock:
+                in_flight[0] -= 1
+            return mock_response(json.dumps(REFSEQ_OK).encode())
+
+        variants = [f"NM_000518.5:c.{n}G>A" for n in range(8)]
+        with patch('variant_tool.variant_validator._REFSEQ_SLOTS', threading.BoundedSemaphore(2)), \
+                patch('variant_tool.session.SESSION.get', side_effect=slow_get):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(lambda v: validate_variant_refseq(v, "GRCh38"), variants))
+        self.assertEqual(results, [REFSEQ_OK] * 8)
+        self.assertLessEqual(in_flight[1], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,239 @@
+"""
+cache.py
+
+Provides a small on-disk cache for API response bodies, backed by SQLite.
+
+Entries are keyed on the full request URL and expire after a configurable time-to-live,
+so repeated lookups of the same variant are served locally instead of over the network.
+Recently used entries are also kept in a small in-memory LRU so repeat lookups within
+one process skip SQLite. Cache failures (e.g. an unwritable directory) are logged and
+treated as cache misses.
+
+The ETag and Last-Modified response headers are stored alongside each body, so an
+expired entry can be revalidated with a conditional request: on 304 Not Modified the
+cached body is reused and its expiry restarted. store_response() also honours the
+response's Cache-Control header: no-store responses are not cached, no-cache ones are
+revalidated on every use, and max-age overrides the default time-to-live.
+"""
+
+import logging  # Import logging for tracking cache activity and errors
+import sqlite3  # Import sqlite3 for the on-disk store
+import threading  # Import threading to serialize access from worker threads
+import time  # Import time for entry timestamps
+from collections import OrderedDict  # Ordered mapping for the in-memory LRU layer
+from typing import NamedTuple  # Immutable cache entry type
+
+logger = logging.getLogger(__name__)
+
+# Default time-to-live for cached responses: one day
+DEFAULT_EXPIRE_AFTER = 24 * 60 * 60
+
+# Default number of entries held in the in-memory LRU layer
+DEFAULT_MEMORY_SIZE = 1024
+
+
+def cache_lifetime(cache_control):
+    """
+    Reads a Cache-Control header value.
+
+    Returns:
+        tuple: (store, max_age) where store is False for no-store, and max_age is the
+               freshness lifetime in seconds (0 for no-cache) or None for the default.
+    """
+    store, max_age = True, None
+    for directive in (cache_control or "").lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        if name == "no-store":
+            store = False
+        elif name == "no-cache":
+            max_age = 0
+        elif name == "max-age" and max_age != 0:
+            try:
+                max_age = max(0, int(value.strip().strip('"')))
+            except ValueError:
+                pass  # Malformed max-age: fall back to the default lifetime
+    return store, max_age
+
+
+class CacheEntry(NamedTuple):
+    """A cached response body with the validators needed to revalidate it."""
+    body: bytes  # Cached response body
+    etag: str  # ETag response header, or None
+    last_modified: str  # Last-Modified response header, or None
+    fresh: bool  # False once the entry is older than the cache's expire_after
+
+    def conditional_headers(self):
+        """Returns the If-None-Match / If-Modified-Since headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """SQLite-backed store of response bodies with a time-to-live."""
+
+    def __init__(self, path, expire_after=DEFAULT_EXPIRE_AFTER, memory_size=DEFAULT_MEMORY_SIZE):
+        """
+        Args:
+            path (str): Location of the SQLite database file.
+            expire_after (float): Seconds after which an entry is considered stale.
+            memory_size (int): Number of recent entries also kept in memory (0 disables).
+        """
+        self.path = str(path)
+        self.expire_after = expire_after
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _remember(self, key, row):
+        """Adds a (body, created, etag, last_modified, max_age) row to the in-memory LRU,
+        evicting the least recently used. Caller holds the lock."""
+        if self.memory_size <= 0:
+            return
+        self._memory[key] = row
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _connect(self):
+        """Opens the database on first use so importing a module never touches disk."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, body BLOB NOT NULL, created REAL NOT NULL, etag TEXT, last_modified TEXT, "
+                "max_age REAL)"
+            )
+            # Databases written by earlier versions lack the header columns
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(responses)")}
+            for column, column_type in (('etag', 'TEXT'), ('last_modified', 'TEXT'), ('max_age', 'REAL')):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE responses ADD COLUMN {column} {column_type}")
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, key):
+        """
+        Returns the cached entry for key, including expired ones, or None if it is missing.
+
+        Args:
+            key (str): Cache key, normally the full request URL.
+
+        Returns:
+            CacheEntry or None: The entry, with fresh=False if it has expired.
+        """
+        with self._lock:
+            row = self._memory.get(key)
+            if row is not None:
+                self._memory.move_to_end(key)
+        if row is None:
+            try:
+                with self._lock:
+                    row = self._connect().execute(
+                        "SELECT body, created, etag, last_modified, max_age FROM responses WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        self._remember(key, row)
+            except sqlite3.Error as e:
+                logger.warning("Response cache read failed for '%s': %s", key, e)
+                return None
+        if row is None:
+            return None
+        body, created, etag, last_modified, max_age = row
+        lifetime = self.expire_after if max_age is None else max_age
+        # A zero lifetime (no-cache / max-age=0) is never fresh and is always revalidated
+        return CacheEntry(body, etag, last_modified, lifetime > 0 and time.time() - created <= lifetime)
+
+    def get(self, key):
+        """
+        Returns the cached body for key, or None if it is missing or expired.
+
+        Args:
+            key (str): Cache key, normally the full request URL.
+        """
+        entry = self.lookup(key)
+        # Treat stale entries as misses; they are revalidated or overwritten on the next store
+        if entry is None or not entry.fresh:
+            return None
+        return entry.body
+
+    def set(self, key, body, etag=None, last_modified=None, max_age=None):
+        """
+        Stores body under key, replacing any previous entry.
+
+        Args:
+            key (str): Cache key, normally the full request URL.
+            body (str or bytes): Response body to store.
+            etag (str): ETag response header, used to revalidate the entry once expired.
+            last_modified (str): Last-Modified response header, used the same way.
+            max_age (float): Freshness lifetime in seconds, or None for expire_after.
+        """
+        row = (body, time.time(), etag, last_modified, max_age)
+        with self._lock:
+            self._remember(key, row)
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, body, created, etag, last_modified, max_age) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, *row)
+                    )
+        except sqlite3.Error as e:
+            logger.warning("Response cache write failed for '%s': %s", key, e)
+
+    def store_response(self, key, response):
+        """
+        Stores a successful HTTP response under key, honouring its Cache-Control header.
+
+        Args:
+            key (str): Cache key, normally the full request URL.
+            response (requests.Response): Response whose body, validators and
+                                          Cache-Control header are stored.
+        """
+        store, max_age = cache_lifetime(response.headers.get('Cache-Control'))
+        if not store:
+            # The server forbids keeping this response; drop any older copy too
+            self.delete(key)
+            return
+        self.set(key, response.content, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                 max_age)
+
+    def revalidated(self, key):
+        """Restarts the expiry of the entry for key after the server confirmed it is unchanged (304)."""
+        created = time.time()
+        with self._lock:
+            row = self._memory.get(key)
+            if row is not None:
+                self._memory[key] = (row[0], created, *row[2:])
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute("UPDATE responses SET created = ? WHERE key = ?", (created, key))
+        except sqlite3.Error as e:
+            logger.warning("Response cache write failed for '%s': %s", key, e)
+
+    def delete(self, key):
+        """Removes the entry for key if present."""
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning("Response cache delete failed for '%s': %s", key, e)
+
+    def close(self):
+        """Closes the underlying database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
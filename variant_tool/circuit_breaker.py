@@ -0,0 +1,128 @@
+"""
+circuit_breaker.py
+
+Provides a thread-safe circuit breaker used to fail fast while an API host is down,
+instead of paying the full request timeout for every variant.
+
+After `threshold` consecutive outage failures the breaker opens and requests are
+rejected immediately. Once `reset_timeout` seconds have passed a single probe request
+is let through (half-open): success closes the breaker, failure re-opens it. A probe
+that never reports back (e.g. its caller gave up before sending it) is replaced by a
+new one after `probe_timeout` seconds, so the breaker cannot stay half-open for good.
+
+Usage:
+    breaker = CircuitBreaker("eutils.ncbi.nlm.nih.gov")
+    if breaker.allow():
+        try:
+            response = session.get(url)
+        except RequestException as e:
+            breaker.record_result(e)
+            raise
+        breaker.record_success()
+"""
+
+import logging  # Import logging for breaker state changes
+import threading  # Import threading to guard breaker state across worker threads
+import time  # Import time for the clock
+from requests.exceptions import ConnectionError, HTTPError, RequestException, RetryError, Timeout
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(RequestException):
+    """Raised instead of sending a request while the breaker for its host is open."""
+
+
+def is_outage(error):
+    """Returns True if a request error means the host is unavailable rather than the request being bad.
+
+    Timeouts, connection failures, exhausted retries and 5xx responses count; 4xx responses do not."""
+    if isinstance(error, (Timeout, ConnectionError, RetryError)):
+        return True
+    if isinstance(error, HTTPError):
+        return error.response is not None and error.response.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    """Rejects requests to a host after `threshold` consecutive failures, re-probing after `reset_timeout` seconds."""
+
+    def __init__(self, name, threshold=5, reset_timeout=30.0, probe_timeout=None, clock=time.monotonic):
+        """
+        Args:
+            name (str): Host or endpoint the breaker guards, used in log messages.
+            threshold (int): Consecutive failures that open the breaker.
+            reset_timeout (float): Seconds to stay open before letting a probe through.
+            probe_timeout (float): Seconds to wait for a probe to report back before letting
+                                   another one through; defaults to reset_timeout.
+            clock (callable): Monotonic clock, injectable for testing.
+        """
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = reset_timeout if probe_timeout is None else probe_timeout
+        self._clock = clock
+        self._state = CLOSED
+        self._fail_count = 0
+        self._opened_at = 0.0
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """Current state: 'closed', 'open' or 'half_open'."""
+        with self._lock:
+            return self._state
+
+    def allow(self):
+        """Returns True if a request may be sent now; moves an expired open breaker to half-open."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            now = self._clock()
+            if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+                # Let exactly one probe through; other callers keep failing fast until it reports back
+                self._state = HALF_OPEN
+                self._probe_started = now
+                logger.info("Circuit for %s half-open, sending probe request", self.name)
+                return True
+            if self._state == HALF_OPEN and now - self._probe_started >= self.probe_timeout:
+                # The last probe never reported back; stop waiting for it and send another
+                self._probe_started = now
+                logger.warning("Probe for %s did not report back, sending another", self.name)
+                return True
+            return False
+
+    def check(self):
+        """Raises CircuitOpenError if a request may not be sent now."""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit open for {self.name}, skipping request")
+
+    def record_success(self):
+        """Closes the breaker and resets the failure count."""
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit for %s closed", self.name)
+            self._state = CLOSED
+            self._fail_count = 0
+
+    def record_failure(self):
+        """Counts a failure, opening the breaker at the threshold or when a probe fails."""
+        with self._lock:
+            self._fail_count += 1
+            if self._state == HALF_OPEN or self._fail_count >= self.threshold:
+                if self._state != OPEN:
+                    logger.warning("Circuit for %s opened after %d consecutive failures", self.name, self._fail_count)
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def record_result(self, error):
+        """Records a failed request: outages count as failures, other errors prove the host is up."""
+        if is_outage(error):
+            self.record_failure()
+        else:
+            self.record_success()
@@ -1,46 +1,365 @@
 """
 clinvar.py
 
-Hclinvar.py
-
 Queries the NCBI ClinVar database using an HGVS variant string to extract clinical classifications.
 
 Functions:
 - search_clinvar_by_hgvs(): Uses eSearch + eSummary API calls to retrieve variant summary data
+- esearch_uid(): Looks up the ClinVar UID for one HGVS variant
+- esummary_many(): Fetches eSummary records for many UIDs in batched requests
+- search_clinvar_many(): Looks up a list of variants with concurrent eSearch and batched eSummary
 - extract_classifications(): Extracts germline, clinical impact, and oncogenicity classifications
 
 Handles input validation, timeout handling, request errors, and logs activity to clinvar_validation.log.
 
 """
 
+import atexit  # Close the response cache at interpreter exit
 import requests  # Import requests for HTTP API calls
-import json  # Import json for parsing API responses
+import orjson  # Import orjson for fast parsing of API responses
 import logging  # Import logging for tracking execution and errors
+import os  # Read the optional NCBI API key from the environment
+import re  # Precompiled HGVS syntax check
+import threading  # Concurrency limit for E-utilities requests
+from concurrent.futures import ThreadPoolExecutor  # Concurrent lookups for batches of variants
+from types import MappingProxyType  # Read-only views for the constant request parameters
+from typing import NamedTuple  # Lightweight result type for classifications
 from requests.exceptions import Timeout, RequestException  # Specific exceptions for requests
+from variant_tool.cache import ResponseCache  # On-disk cache for repeat lookups
+from variant_tool.circuit_breaker import CircuitBreaker  # Fail fast while E-utilities is down
+from variant_tool.logcontext import bind_variant  # Tag log records with the variant being searched
+from variant_tool.ratelimit import TokenBucket  # Client-side throttle for NCBI rate limits
+from variant_tool.session import (SESSION, DeadlineExceeded, RequestCancelled,  # Shared pooled session
+                                  deadline_timeout, send_with_retries)
 
 logger = logging.getLogger(__name__)
 
-def search_clinvar_by_hgvs(hgvs_variant):
+# (connect, read) timeouts: a slow handshake fails fast without eating the read budget;
+# capped per call by any end-to-end deadline
+_TIMEOUT = (3.05, 10)
+
+# On-disk cache of E-utilities responses, keyed on the full request URL
+_CACHE = ResponseCache("clinvar_cache.sqlite")
+atexit.register(_CACHE.close)
+
+# NCBI allows 3 requests/second without an API key and 10 with one
+_NCBI_API_KEY = os.getenv("NCBI_API_KEY")
+_BUCKET = TokenBucket(10 if _NCBI_API_KEY else 3)
+# Bulkhead: no more requests in flight than the per-second allowance, so a burst of
+# workers queues here instead of tripping NCBI's 429s while earlier requests are slow
+_SLOTS = threading.BoundedSemaphore(10 if _NCBI_API_KEY else 3)
+
+# Opens after repeated outages so the remaining variants of a batch skip the request timeout
+_BREAKER = CircuitBreaker("eutils.ncbi.nlm.nih.gov")
+
+# E-utilities endpoints and the request parameters that never change between calls
+_ESEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+_ESUMMARY_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
+_ESEARCH_BASE_PARAMS = MappingProxyType({
+    'db': 'clinvar',  # Specify ClinVar database
+    'retmode': 'json',  # Request JSON response
+    'rettype': 'uilist',  # Only the matching UIDs are needed
+    'retmax': 1  # Limit to 1 result
+})
+_ESUMMARY_BASE_PARAMS = MappingProxyType({
+    'db': 'clinvar',  # Specify ClinVar database
+    'retmode': 'json'  # Request JSON response
+})
+
+# eSummary accepts up to 200 comma-separated UIDs per request
+_ESUMMARY_BATCH_SIZE = 200
+
+# Cheap syntax check so obviously malformed HGVS strings never reach eSearch:
+# RefSeq (NM_, NC_, NG_, NR_, NP_, NT_, NW_, XM_, XP_, XR_), Ensembl (ENST, ENSP) or LRG
+# reference, an optional gene annotation as ClinVar writes it ('NM_000518.5(HBB)'), a colon,
+# then a coordinate type prefix such as 'c.' or 'g.'
+_HGVS_RE = re.compile(
+    r'^(?:(?:N[CGMPRTW]|X[MPR])_\d+(?:\.\d+)?|ENS[TP]\d+(?:\.\d+)?|LRG_\d+(?:[tp]\d+)?)'
+    r'(?:\([A-Za-z0-9_-]+\))?'
+    r':[cgmnopr]\..+'
+)
+
+# Fallback values for classifications missing from a ClinVar record
+_NO_GERMLINE_CLASSIFICATION = 'No germline classification available'
+_NO_CLINICAL_IMPACT_CLASSIFICATION = 'No clinical impact classification available'
+_NO_ONCOGENICITY_CLASSIFICATION = 'No oncogenicity classification available'
+
+
+class EutilsError(RequestException):
+    """Raised when E-utilities answers HTTP 200 with an error body instead of results."""
+
+
+def _eutils_error(url, data):
     """
-    Queries the NCBI ClinVar API for a given HGVS variant and returns the results.
+    Returns the error reported in an E-utilities response body, or None if it holds results.
+
+    NCBI reports backend failures such as {"esearchresult": {"ERROR": "Search Backend failed"}}
+    with HTTP 200, so the status code alone does not show whether a request worked.
+    """
+    if not isinstance(data, dict):
+        return f"unexpected response type {type(data).__name__}"
+    error = data.get('error') or data.get('ERROR')
+    if error:
+        return str(error)
+    if url == _ESEARCH_URL:
+        search_result = data.get('esearchresult')
+        if not isinstance(search_result, dict):
+            return "response has no esearchresult block"
+        if search_result.get('ERROR'):
+            return str(search_result['ERROR'])
+        if 'count' not in search_result:
+            return "esearchresult has no count"
+    return None
+
+
+class Classifications(NamedTuple):
+    """Classification details extracted from one ClinVar eSummary record.
+
+    The fields cannot be reassigned, but the classification blocks are the record's own
+    dicts rather than copies."""
+    uid: str  # ClinVar UID of the record
+    clinical_significance: dict  # Legacy clinical significance block ({} if absent)
+    germline_classification: object  # Germline block, or a placeholder message
+    clinical_impact_classification: object  # Somatic clinical impact block, or a placeholder message
+    oncogenicity_classification: object  # Oncogenicity block, or a placeholder message
+
+
+def _hgvs_term(hgvs_variant):
+    """Builds the eSearch term for an exact HGVS match."""
+    return f'"{hgvs_variant.strip()}"[hgvs]'
+
+
+def _build_search_params(hgvs_variant):
+    """Builds the eSearch query parameters for an exact HGVS match."""
+    return {**_ESEARCH_BASE_PARAMS, 'term': _hgvs_term(hgvs_variant)}  # Search for exact HGVS match
+
+
+def _request_json(method, url, params, refresh=False, deadline=None, cancelled=None):
+    """
+    Sends a GET or POST request to E-utilities and returns the parsed JSON body.
+
+    Successful responses are stored in the on-disk cache and repeat requests for the
+    same URL and parameters are served from it. Expired entries are revalidated with a
+    conditional request and reused on 304 Not Modified. With refresh=True the cached
+    entry is dropped first. POST requests send params as a form body. Once deadline
+    (a time.monotonic() value) has passed, requests fail with DeadlineExceeded, and once
+    the cancelled event is set they fail with RequestCancelled. Error bodies sent with
+    HTTP 200 raise EutilsError and are not cached.
+    """
+    # Key the cache on the full URL including the query string
+    cache_key = requests.Request('GET', url, params=params).prepare().url
+    entry = None
+    if refresh:
+        _CACHE.delete(cache_key)
+    else:
+        entry = _CACHE.lookup(cache_key)
+        if entry is not None and entry.fresh:
+            logger.debug("ClinVar response served from cache: %s", cache_key)
+            return orjson.loads(entry.body)
+    # Send If-None-Match / If-Modified-Since for an expired entry
+    headers = entry.conditional_headers() if entry is not None else None
+
+    # Checked before the breaker, so a spent budget or cancelled caller neither counts as an
+    # outage nor takes (and then abandons) the half-open probe
+    deadline_timeout(_TIMEOUT, deadline, cancelled)
+    # Fail fast with CircuitOpenError (a RequestException) while E-utilities is down
+    _BREAKER.check()
+    # The API key is sent with the request but kept out of the cache key
+    request_params = {**params, 'api_key': _NCBI_API_KEY} if _NCBI_API_KEY else params
+
+    def send(timeout):
+        # Every attempt, retries included, takes a slot and a rate limit token
+        with _SLOTS, _BUCKET:
+            if method == 'POST':
+                return SESSION.post(url, data=request_params, headers=headers, timeout=timeout)
+            return SESSION.get(url, params=request_params, headers=headers, timeout=timeout)
+
+    try:
+        # Transient failures are retried, but only as long as the deadline leaves room
+        response = send_with_retries(send, _TIMEOUT, deadline, cancelled)
+        # Back off until the bucket refills when NCBI reports the quota is nearly spent
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        if remaining is not None and remaining.isdigit() and int(remaining) <= 1:
+            logger.info("NCBI rate limit nearly exhausted (%s remaining), backing off", remaining)
+            _BUCKET.drain()
+        # Raise exception for HTTP errors
+        response.raise_for_status()
+    except DeadlineExceeded:
+        # Out of budget or cancelled before the next attempt: says nothing about the host
+        raise
+    except RequestException as e:
+        _BREAKER.record_result(e)
+        raise
+    _BREAKER.record_success()
+    if response.status_code == 304 and entry is not None:
+        # Unchanged on the server: skip the body transfer and reuse the cached copy
+        logger.debug("ClinVar response revalidated: %s", cache_key)
+        _CACHE.revalidated(cache_key)
+        return orjson.loads(entry.body)
+    # Parse the raw body directly, skipping the bytes -> str decode of response.json()
+    data = orjson.loads(response.content)
+    error = _eutils_error(url, data)
+    if error is not None:
+        # Keep the error out of the cache so the next call asks again
+        logger.warning("E-utilities returned an error body for %s: %s", cache_key, error)
+        raise EutilsError(f"E-utilities error: {error}", response=response)
+    _CACHE.store_response(cache_key, response)
+    logger.debug("ClinVar response fetched from network: %s", cache_key)
+    return data
+
+
+def _is_searchable_hgvs(hgvs_variant):
+    """
+    Checks that hgvs_variant is worth sending to eSearch.
+
+    Returns:
+        bool: False if the string cannot be valid HGVS.
+
+    Raises:
+        ValueError: If hgvs_variant is empty or not a string.
+    """
+    # Validate that the input is a non-empty string
+    if not isinstance(hgvs_variant, str) or not hgvs_variant.strip():
+        logger.error("HGVS variant must be a non-empty string")
+        raise ValueError("HGVS variant must be a non-empty string")
+    # Skip the network entirely for strings that cannot be valid HGVS
+    if not _HGVS_RE.match(hgvs_variant.strip()):
+        logger.info("Skipping ClinVar search for obviously invalid HGVS variant '%s'", hgvs_variant)
+        return False
+    return True
+
+
+def esearch_uid(hgvs_variant, refresh=False, deadline=None, cancelled=None):
+    """
+    Looks up the ClinVar UID for an HGVS variant with eSearch.
+
+    Args:
+        hgvs_variant (str): The HGVS variant string to search for.
+        refresh (bool): If True, bypass the on-disk cache and fetch fresh data.
+        deadline (float): Optional time.monotonic() value by which the request must finish.
+        cancelled (threading.Event): Optional event the caller sets once it no longer needs the result.
+
+    Returns:
+        str or None: The first matching ClinVar UID, or None if there is no match.
+
+    Raises:
+        requests.exceptions.RequestException, orjson.JSONDecodeError: On request or parse failures,
+            including EutilsError for an error body sent with HTTP 200.
+    """
+    # Send GET request to search ClinVar IDs
+    search_data = _request_json('GET', _ESEARCH_URL, _build_search_params(hgvs_variant), refresh, deadline,
+                                cancelled)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("ClinVar eSearch response: %r", search_data)
+
+    # Check if any results were found; error bodies without a count raised EutilsError above
+    search_result = search_data['esearchresult']
+    if int(search_result['count']) == 0 or not search_result.get('idlist'):
+        return None
+
+    # Extract the matching ClinVar UID for the summary fetch
+    uid = search_result['idlist'][0]
+    logger.debug("ClinVar UID for '%s': %s", hgvs_variant, uid)
+    return uid
+
+
+def esummary_many(uids, refresh=False, deadline=None, cancelled=None):
+    """
+    Fetches eSummary records for a list of ClinVar UIDs.
+
+    UIDs are sent as a comma-separated id list, up to 200 per POST request, and the
+    per-request results are merged into a single eSummary-shaped dictionary.
+
+    Args:
+        uids (list[str]): ClinVar UIDs to fetch; duplicates are fetched once.
+        refresh (bool): If True, bypass the on-disk cache and fetch fresh data.
+        deadline (float): Optional time.monotonic() value by which all requests must finish.
+        cancelled (threading.Event): Optional event the caller sets once it no longer needs the result.
+
+    Returns:
+        dict or None: {'result': {'uids': [...], <uid>: {...}, ...}}, or None if no
+                      response contained a result block.
+
+    Raises:
+        requests.exceptions.RequestException, orjson.JSONDecodeError: On request or parse failures.
+    """
+    unique_uids = list(dict.fromkeys(uids))
+    merged = {'uids': []}
+    found_result = False
+    for start in range(0, len(unique_uids), _ESUMMARY_BATCH_SIZE):
+        chunk = unique_uids[start:start + _ESUMMARY_BATCH_SIZE]
+        # Fetch the UIDs directly, no history server round trip
+        summary_params = {**_ESUMMARY_BASE_PARAMS, 'id': ','.join(chunk)}
+        # POST keeps long id lists clear of URL length limits
+        summary_data = _request_json('POST', _ESUMMARY_URL, summary_params, refresh, deadline, cancelled)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("ClinVar eSummary response: %r", summary_data)
+        if 'result' not in summary_data:
+            continue
+        found_result = True
+        result = summary_data['result']
+        for uid in result.get('uids', []):
+            merged['uids'].append(uid)
+            if uid in result:
+                merged[uid] = result[uid]
+    return {'result': merged} if found_result else None
+
+
+def search_clinvar(hgvs_variant, refresh=False, deadline=None, cancelled=None):
+    """
+    Queries the NCBI ClinVar API for a given HGVS variant, raising on failures.
+
+    This is search_clinvar_by_hgvs() without the error handling, for callers that
+    report failures themselves.
 
     Args:
         hgvs_variant (str): The HGVS variant string to search for (e.g., 'NM_000518.5:c.92+1G>A').
+        refresh (bool): If True, bypass the on-disk cache and fetch fresh data.
+        deadline (float): Optional time.monotonic() value by which both requests must finish.
+        cancelled (threading.Event): Optional event the caller sets once it no longer needs the
+                                     result; no further request is sent after that.
 
     Returns:
-        dict or None: A dictionary containing the JSON response from the ClinVar API if successful,
-                     or None if an error occurs or no results are found.
+        dict or None: The eSummary response for the matching record, or None if the
+                      variant cannot be valid HGVS or has no ClinVar record.
 
     Raises:
         ValueError: If hgvs_variant is empty or not a string.
+        requests.exceptions.RequestException, orjson.JSONDecodeError: On request or parse failures.
     """
+    if not _is_searchable_hgvs(hgvs_variant):
+        return None
+    return _search_checked_hgvs(hgvs_variant, refresh, deadline, cancelled)
+
+
+def _search_checked_hgvs(hgvs_variant, refresh, deadline, cancelled):
+    """Runs the eSearch and eSummary steps for a variant that already passed _is_searchable_hgvs()."""
+    # Log the start of the ClinVar search
+    logger.info("Searching ClinVar for HGVS variant '%s'", hgvs_variant)
+    uid = esearch_uid(hgvs_variant, refresh, deadline, cancelled)
+    if uid is None:
+        logger.info("No ClinVar results found for '%s'", hgvs_variant)
+        return None
+
+    # Fetch detailed summary data
+    summary_data = esummary_many([uid], refresh, deadline, cancelled)
+    logger.info("Successfully retrieved ClinVar data for '%s'", hgvs_variant)
+    # Return summary data if it contains results, otherwise None
+    return summary_data
 
-def search_clinvar_by_hgvs(hgvs_variant):
+
+def search_clinvar_by_hgvs(hgvs_variant, refresh=False, deadline=None, cancelled=None):
     """
     Queries the NCBI ClinVar API for a given HGVS variant and returns the results.
 
+    Failures are logged, not printed, so the search can run on worker threads.
+
     Args:
         hgvs_variant (str): The HGVS variant string to search for (e.g., 'NM_000518.5:c.92+1G>A').
+        refresh (bool): If True, bypass the on-disk cache and fetch fresh data.
+        deadline (float): Optional time.monotonic() value by which both requests must finish.
+        cancelled (threading.Event): Optional event the caller sets once it no longer needs the
+                                     result; no further request is sent after that.
 
     Returns:
         dict or None: A dictionary containing the JSON response from the ClinVar API if successful,
@@ -49,88 +368,118 @@ def search_clinvar_by_hgvs(hgvs_variant):
     Raises:
         ValueError: If hgvs_variant is empty or not a string.
     """
-    # Validate that the input is a non-empty string
-    if not isinstance(hgvs_variant, str) or not hgvs_variant.strip():
-        logger.error("HGVS variant must be a non-empty string")
-        raise ValueError("HGVS variant must be a non-empty string")
-
-    # Log the start of the ClinVar search
-    logger.info(f"Searching ClinVar for HGVS variant '{hgvs_variant}'")
-    # Define the base URL for ClinVar's eSearch API
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-    # Set up parameters for the eSearch request
-    params = {
-        'db': 'clinvar',  # Specify ClinVar database
-        'term': f'"{hgvs_variant.strip()}"[hgvs]',  # Search for exact HGVS match
-        'retmode': 'json',  # Request JSON response
-        'retmax': 1,  # Limit to 1 result
-        'usehistory': 'y'  # Enable history for detailed fetch
-    }
-
+    # Bad input is the caller's error, raised before any search failure is handled
+    if not _is_searchable_hgvs(hgvs_variant):
+        return None
     try:
-        # Send GET request to search ClinVar IDs
-        response = requests.get(base_url, params=params, timeout=10)
-        # Raise exception for HTTP errors
-        response.raise_for_status()
-        # Parse the JSON response
-        search_data = response.json()
-        logger.debug(f"ClinVar eSearch response: {search_data}")
-
-        # Check if any results were found
-        if 'esearchresult' not in search_data or int(search_data['esearchresult']['count']) == 0:
-            logger.info(f"No ClinVar results found for '{hgvs_variant}'")
-            return None
-
-        # Extract WebEnv and QueryKey for detailed fetch
-        webenv = search_data['esearchresult']['webenv']
-        query_key = search_data['esearchresult']['querykey']
-        logger.debug(f"WebEnv: {webenv}, QueryKey: {query_key}")
-
-        # Define the base URL for ClinVar's eSummary API
-        summary_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
-        # Set up parameters for eSummary request
-        summary_params = {
-            'db': 'clinvar',  # Specify ClinVar database
-            'query_key': query_key,  # Reference the search result
-            'WebEnv': webenv,  # Use history token
-            'retmode': 'json',  # Request JSON response
-            'retmax': 1  # Limit to 1 result
-        }
-
-        # Fetch detailed summary data
-        summary_response = requests.get(summary_url, params=summary_params, timeout=10)
-        # Raise exception for HTTP errors
-        summary_response.raise_for_status()
-        # Parse the JSON response
-        summary_data = summary_response.json()
-        logger.info(f"Successfully retrieved ClinVar data for '{hgvs_variant}'")
-        logger.debug(f"ClinVar eSummary response: {summary_data}")
-
-        # Return summary data if it contains results, otherwise None
-        return summary_data if 'result' in summary_data else None
-
+        return _search_checked_hgvs(hgvs_variant, refresh, deadline, cancelled)
+    except RequestCancelled:
+        # The caller no longer needs the result (e.g. validation failed); not an error
+        logger.info("ClinVar search for '%s' cancelled by caller", hgvs_variant)
+        return None
     except Timeout:
         # Handle ClinVar request timeout
-        logger.error(f"ClinVar request timed out after 10 seconds for '{hgvs_variant}'")
-        print(f"Request timed out after 10 seconds for HGVS variant: {hgvs_variant}")
+        logger.error("ClinVar request timed out for '%s'", hgvs_variant)
         return None
     except RequestException as e:
         # Handle other ClinVar HTTP errors
-        logger.error(f"ClinVar API request error for '{hgvs_variant}': {e}")
-        print(f"Error during ClinVar API request for HGVS variant '{hgvs_variant}': {e}")
+        logger.error("ClinVar API request error for '%s': %s", hgvs_variant, e)
         return None
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         # Handle JSON parsing errors from ClinVar response
-        logger.error(f"JSON decode error in ClinVar response for '{hgvs_variant}': {e}")
-        print(f"Error decoding JSON response for HGVS variant '{hgvs_variant}': {e}")
+        logger.error("JSON decode error in ClinVar response for '%s': %s", hgvs_variant, e)
         return None
     except Exception as e:
         # Handle unexpected errors in ClinVar search
-        logger.error(f"Unexpected error searching ClinVar for '{hgvs_variant}': {e}")
-        print(f"An unexpected error occurred while searching ClinVar: {e}")
+        logger.error("Unexpected error searching ClinVar for '%s': %s", hgvs_variant, e)
         return None
 
 
+def _search_uid_logged(hgvs_variant, refresh, return_exceptions=False, deadline=None):
+    """Runs esearch_uid for one checked variant of a batch, logging failures instead of raising."""
+    with bind_variant(hgvs_variant):
+        try:
+            return esearch_uid(hgvs_variant, refresh, deadline)
+        except (RequestException, KeyError, ValueError, TypeError) as e:
+            # ValueError covers orjson.JSONDecodeError as well as an odd count or idlist
+            # in an otherwise well-formed reply; either way only this variant fails
+            logger.error("ClinVar eSearch failed for '%s': %r", hgvs_variant, e)
+            return e if return_exceptions else None
+
+
+def search_clinvar_many(variants, max_workers=8, refresh=False, return_exceptions=False, deadline=None):
+    """
+    Queries ClinVar for several HGVS variants.
+
+    eSearch runs once per distinct variant, concurrently over the shared session, and the
+    matching UIDs are then fetched together with esummary_many(). Request errors
+    are logged and reported as None for the affected variants, or as the exception
+    itself when return_exceptions is True.
+
+    Args:
+        variants (list[str]): HGVS variant strings to search for.
+        max_workers (int): Maximum number of eSearch lookups in flight at once.
+        refresh (bool): If True, bypass the on-disk cache and fetch fresh data.
+        return_exceptions (bool): If True, a failed lookup is reported as its exception
+                                  rather than None, so callers can tell "not found"
+                                  from "search failed".
+        deadline (float): Optional time.monotonic() value bounding every request; lookups
+                          still pending when it passes fail with DeadlineExceeded.
+
+    Returns:
+        list: One entry per input variant, in input order, each being the value
+              search_clinvar_by_hgvs() would return for that variant (or the
+              exception it failed with, when return_exceptions is True).
+
+    Raises:
+        ValueError: If any variant is empty or not a string.
+    """
+    logger.info("Searching ClinVar for %s HGVS variants", len(variants))
+    if not variants:
+        return []
+    # Fail fast on bad input before any request is made, checking each distinct variant once;
+    # keys are stripped like the eSearch term, so ' X' and 'X' share one lookup
+    searchable = {}
+    for hgvs_variant in variants:
+        key = hgvs_variant.strip() if isinstance(hgvs_variant, str) else None
+        if key is None or key not in searchable:
+            searchable[key] = _is_searchable_hgvs(hgvs_variant)
+    terms = [key for key, ok in searchable.items() if ok]
+
+    # The lookups are network-bound, so threads overlap the round trips
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        uid_by_term = dict(zip(terms, executor.map(
+            lambda v: _search_uid_logged(v, refresh, return_exceptions, deadline),
+            terms,
+        )))
+    # Map the lookups back to input order; repeated variants share one result
+    uids = [uid_by_term.get(hgvs_variant.strip()) for hgvs_variant in variants]
+
+    # Failed lookups stay in place as their exception and skip the eSummary request
+    failed = [isinstance(uid, Exception) for uid in uids]
+    found_uids = [uid for uid, fail in zip(uids, failed) if uid is not None and not fail]
+    if not found_uids:
+        return [uid if fail else None for uid, fail in zip(uids, failed)]
+    try:
+        summary_data = esummary_many(found_uids, refresh, deadline)
+    except (RequestException, KeyError, ValueError, TypeError) as e:
+        logger.error("ClinVar eSummary failed for %s UIDs: %r", len(found_uids), e)
+        # Every variant with a UID was waiting on this one request
+        summary_error = e if return_exceptions else None
+        return [uid if fail else (summary_error if uid is not None else None)
+                for uid, fail in zip(uids, failed)]
+    if summary_data is None:
+        return [uid if fail else None for uid, fail in zip(uids, failed)]
+
+    # Split the combined summary back into one single-record result per variant
+    result = summary_data['result']
+    return [
+        uid if fail else
+        {'result': {'uids': [uid], uid: result[uid]}} if uid is not None and uid in result else None
+        for uid, fail in zip(uids, failed)
+    ]
+
+
 def extract_classifications(result_data, uid):
     """
     Extracts specific classification details from ClinVar JSON result.
@@ -140,39 +489,26 @@ def extract_classifications(result_data, uid):
         uid (str): The unique identifier for the result.
 
     Returns:
-        dict: A dictionary with germline_classification, clinical_impact_classification,and oncogenicity_classification.
+        Classifications or None: The uid, clinical_significance, germline_classification,
+                                 clinical_impact_classification and oncogenicity_classification
+                                 of the record, or None if extraction fails.
     """
     # Log the start of classification extraction
-    logger.info(f"Extracting classifications for UID: {uid}")
-    try:
-        # Extract clinical significance, defaulting to empty dict if not present
-        clinical_significance = result_data.get('clinical_significance', {})
-        # Extract germline classification with fallback message
-        germline_classification = result_data.get('germline_classification', 'No germline classification available')
-        # Extract clinical impact classification with fallback message
-        clinical_impact = result_data.get('clinical_impact_classification',
-                                          'No clinical impact classification available')
-        # Extract oncogenicity classification with fallback message
-        oncogenicity_classification = result_data.get('oncogenicity_classification',
-                                                      'No oncogenicity classification available')
-
-        # Construct and return the classifications dictionary
-        classifications = {
-            'uid': uid,
-            'clinical_significance': clinical_significance,
-            'germline_classification': germline_classification,
-            'clinical_impact_classification': clinical_impact,
-            'oncogenicity_classification': oncogenicity_classification
-        }
-        logger.debug(f"Classifications extracted: {classifications}")
-        return classifications
-    except KeyError as e:
-        # Handle missing keys in result_data
-        logger.error(f"Key error extracting classifications for UID {uid}: {e}")
-        print(f"Error: Missing expected key in ClinVar data for UID {uid}: {e}")
-        return None
-    except Exception as e:
-        # Handle unexpected errors during extraction
-        logger.error(f"Unexpected error extracting classifications for UID {uid}: {e}")
-        print(f"An unexpected error occurred while extracting classifications: {e}")
+    logger.info("Extracting classifications for UID: %s", uid)
+    # Only .get() lookups with defaults follow, so a non-dict record is the one failure case
+    if not isinstance(result_data, dict):
+        logger.error("Unexpected ClinVar record type for UID %s: %s", uid, type(result_data).__name__)
         return None
+
+    # Construct and return the classifications, with fallback messages for missing blocks
+    classifications = Classifications(
+        uid=uid,
+        clinical_significance=result_data.get('clinical_significance', {}),
+        germline_classification=result_data.get('germline_classification', _NO_GERMLINE_CLASSIFICATION),
+        clinical_impact_classification=result_data.get('clinical_impact_classification',
+                                                       _NO_CLINICAL_IMPACT_CLASSIFICATION),
+        oncogenicity_classification=result_data.get('oncogenicity_classification',
+                                                    _NO_ONCOGENICITY_CLASSIFICATION)
+    )
+    logger.debug("Classifications extracted: %r", classifications)
+    return classifications
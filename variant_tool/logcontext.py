@@ -0,0 +1,57 @@
+"""
+logcontext.py
+
+Tags log records with the variant being processed, so interleaved lines from
+concurrent lookups (batch mode, validate_many, the background ClinVar search)
+can be told apart in the log file.
+
+- CURRENT_VARIANT: context variable holding the variant for the running task ('-' if none)
+- bind_variant(): sets CURRENT_VARIANT for the duration of a with-block
+- submit_in_context(): submits work to an executor so it sees the caller's bound variant
+- VariantFilter: logging filter that copies CURRENT_VARIANT onto each record as `variant`
+
+Usage:
+    handler.addFilter(VariantFilter())
+    handler.setFormatter(logging.Formatter('%(variant)s - %(message)s'))
+    with bind_variant("NM_000518.5:c.92+1G>A"):
+        future = submit_in_context(executor, lookup, "NM_000518.5:c.92+1G>A")
+"""
+
+import contextlib  # Context manager for binding a variant
+import contextvars  # Per-thread / per-task variant binding
+import logging  # Logging filter base class
+
+# The variant the current thread or task is working on
+CURRENT_VARIANT = contextvars.ContextVar("variant", default="-")
+
+
+@contextlib.contextmanager
+def bind_variant(variant):
+    """Sets CURRENT_VARIANT to variant inside the with-block, restoring the previous value after."""
+    token = CURRENT_VARIANT.set(variant)
+    try:
+        yield
+    finally:
+        CURRENT_VARIANT.reset(token)
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """
+    Submits fn(*args, **kwargs) to executor, running it in a copy of the caller's context.
+
+    Executor threads do not inherit context variables, so without this records logged by
+    the worker would lose the caller's variant. Each call takes its own copy, since one
+    Context cannot be entered by two threads at once.
+
+    Returns:
+        concurrent.futures.Future: The future returned by executor.submit().
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class VariantFilter(logging.Filter):
+    """Adds the bound variant to every record as record.variant; never drops records."""
+
+    def filter(self, record):
+        record.variant = CURRENT_VARIANT.get()
+        return True
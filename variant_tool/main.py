@@ -6,6 +6,8 @@ retrieving related classification data from NCBI ClinVar.
 Main entry point for the HGVS variant classification tool.
 
 This script coordinates input collection, variant validation, ClinVar query, and final output.
+The lookup itself is run_pipeline(), which does no console I/O and can be imported directly;
+main() is the CLI around it (interactive prompts, or --batch FILE for many variants).
 It uses external modules:
 - variant_validator.py for HGVS variant validation
 - clinvar.py for ClinVar querying and classification extraction
@@ -13,119 +15,366 @@ It uses external modules:
 **Final output is formatted using pretty_print_results() from output.py for clear, structured display.
 
 Logging is enabled to 'clinvar_validation.log' with rotating file support.
-Run via: python main.py
+Run via: variant-tool (or python -m variant_tool.main)
 
 **************
 """
 
+import argparse  # Import argparse for command-line options
+import atexit  # Stop the log listener at interpreter exit
 import logging  # Import logging for tracking execution and errors
-from logging.handlers import RotatingFileHandler
-from variant_validator import validate_hgvs_variant
-from variant_tool.clinvar import search_clinvar_by_hgvs, extract_classifications
-from output import extract_gene_symbol, format_results, pretty_print_results
+import math  # Size the --batch deadline by the number of worker rounds
+import queue  # Queue between loggers and the background log writer
+import sys  # Import sys for buffered debug output
+import threading  # Tell the background ClinVar search to stop when it is not needed
+import time  # Monotonic clock for the end-to-end deadline
+import orjson  # Import orjson for fast serialization of debug dumps
+from concurrent.futures import ThreadPoolExecutor  # Overlap the ClinVar search with validation
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from requests.exceptions import RequestException, Timeout  # Tell ClinVar failures apart in the report
+from variant_tool.variant_validator import validate_hgvs_variant, validate_many
+from variant_tool.clinvar import search_clinvar, search_clinvar_many, extract_classifications
+from variant_tool.session import RequestCancelled
+from variant_tool.output import extract_gene_symbol, format_results, pretty_print_results
+from variant_tool.logcontext import VariantFilter, bind_variant, submit_in_context
 
 
-# Configure logging to use RotatingFileHandler with detailed format
-log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
-rotating_handler = RotatingFileHandler(
-    "../clinvar_validation.log",   # Log file name
-    maxBytes=5 * 1024 * 1024,   # 5 MB file size limit
-    backupCount=3               # Keep 3 backup log files
-)
-rotating_handler.setFormatter(log_formatter)
+# Background writer for the log file, started by configure_logging()
+_log_listener = None
 
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-logger.addHandler(rotating_handler)
+# End-to-end network budget for one variant (validation and ClinVar search together), in seconds
+TOTAL_BUDGET_S = 30
+
+# Variants processed at once in --batch mode
+BATCH_WORKERS = 4
+
+
+def configure_logging():
+    """Attaches the rotating log file handler to the root logger. Deferred to main()
+    so importing this module does not open the log file; repeat calls are no-ops.
+
+    Records are handed to a QueueHandler and written to disk by a background
+    QueueListener, so logging never blocks the calling thread on file I/O. Each record
+    is tagged with the variant being processed (or '-') before it is queued."""
+    global _log_listener
+    if _log_listener is not None:
+        return
+    # Configure logging to use RotatingFileHandler with detailed format
+    log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(variant)s] - %(message)s')
+
+    rotating_handler = RotatingFileHandler(
+        "../clinvar_validation.log",   # Log file name
+        maxBytes=5 * 1024 * 1024,   # 5 MB file size limit
+        backupCount=3               # Keep 3 backup log files
+    )
+    rotating_handler.setFormatter(log_formatter)
+
+    # Hot-path loggers only enqueue; the listener thread owns the file handler
+    log_queue = queue.SimpleQueue()
+    _log_listener = QueueListener(log_queue, rotating_handler)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+    # Attach to the root logger so the clinvar, variant_validator and cache module
+    # loggers reach the log file too, not just this module's
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    # The filter runs in the logging thread, where the variant context is still bound
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(VariantFilter())
+    root_logger.addHandler(queue_handler)
+
+
+def parse_args(argv=None):
+    """Parses command-line options."""
+    parser = argparse.ArgumentParser(
+        description="Validate an HGVS variant and retrieve its ClinVar classifications."
+    )
+    parser.add_argument("--debug", action="store_true",
+                        help="print the raw ClinVar response and extracted classifications")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="process every HGVS variant in FILE (one per line) instead of prompting")
+    parser.add_argument("--genome-build", metavar="BUILD",
+                        help="genome build (GRCh38 or GRCh37); prompted for if omitted")
+    return parser.parse_args(argv)
+
+
+def write_debug_json(title, data):
+    """Writes a titled, indented JSON dump of data to stdout in a single write."""
+    sys.stdout.write(f"\n{title}\n{orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()}\n")
+
+
+def check_inputs(hgvs_variant, genome_build):
+    """Raises ValueError if the HGVS variant is empty or the genome build is not GRCH38/GRCH37."""
+    if not hgvs_variant:
+        logger.error("No HGVS variant provided")
+        raise ValueError("No HGVS variant provided")
+    if genome_build not in ["GRCH38", "GRCH37"]:
+        logger.error("Invalid genome build: %s", genome_build)
+        raise ValueError("Genome build must be GRCh38 or GRCh37")
+
+
+def read_batch_file(path):
+    """Returns the HGVS variants listed in path, one per line, skipping blank lines and # comments."""
+    with open(path, encoding="utf-8") as batch_file:
+        return [line.strip() for line in batch_file if line.strip() and not line.lstrip().startswith("#")]
+
+
+def run_pipeline(hgvs_variant, genome_build, deadline=None):
+    """
+    Validates an HGVS variant and looks up its ClinVar classifications, without any
+    console I/O, so it can be driven from scripts, notebooks and tests.
+
+    The ClinVar search runs in a worker thread alongside validation, so the
+    end-to-end latency is roughly the slower of the two rather than their sum.
+    If validation fails the search is told to stop: it sends no further request
+    or retry, though a request already in flight runs to completion (bounded by
+    the deadline) in the background before its result is discarded.
+
+    Args:
+        hgvs_variant (str): The HGVS variant string (e.g., 'NM_000518.5:c.92+1G>A').
+        genome_build (str): 'GRCH38' or 'GRCH37'.
+        deadline (float): time.monotonic() value bounding every request; defaults to
+                          TOTAL_BUDGET_S from now.
+
+    Returns:
+        dict or None: None if VariantValidator does not validate the variant, otherwise
+                      {'variant', 'genome_build', 'gene_symbol' (str or None),
+                      'clinvar_results' (dict or None), 'classifications' (Classifications or None),
+                      'clinvar_error' (the exception the ClinVar search failed with, or None)}.
+
+    Raises:
+        ValueError: If the inputs are invalid.
+    """
+    check_inputs(hgvs_variant, genome_build)
+    # One deadline shared by every request, so a slow endpoint eats into the budget
+    # left for the others instead of each getting its own full timeout
+    if deadline is None:
+        deadline = time.monotonic() + TOTAL_BUDGET_S
+    with bind_variant(hgvs_variant):
+        return _run_pipeline(hgvs_variant, genome_build, deadline)
+
+
+def _search_clinvar(hgvs_variant, deadline, cancelled):
+    """
+    Runs the ClinVar search for run_pipeline(), returning (results, error) instead of
+    raising, so the failure can be reported by print_report() rather than printed here.
+    """
+    try:
+        return search_clinvar(hgvs_variant, deadline=deadline, cancelled=cancelled), None
+    except RequestCancelled:
+        # Validation already failed, so nobody is waiting for this result
+        logger.info("ClinVar search for '%s' cancelled", hgvs_variant)
+        return None, None
+    except (RequestException, orjson.JSONDecodeError) as e:
+        logger.error("ClinVar search failed for '%s': %s", hgvs_variant, e)
+        return None, e
+    except Exception as e:
+        # Catch-all so an unexpected failure is reported for this variant only
+        logger.error("Unexpected error searching ClinVar for '%s': %s", hgvs_variant, e, exc_info=True)
+        return None, e
+
+
+def _run_pipeline(hgvs_variant, genome_build, deadline):
+    """Runs the validation and ClinVar steps of run_pipeline() with the variant bound for logging."""
+    # The ClinVar search only needs the input string, so start it now and let it
+    # run while VariantValidator is queried
+    clinvar_cancelled = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1)
+    clinvar_future = submit_in_context(executor, _search_clinvar, hgvs_variant, deadline, clinvar_cancelled)
+    executor.shutdown(wait=False)
 
+    # Step 1: Validate the HGVS variant using VariantValidator
+    validation_result = validate_hgvs_variant(hgvs_variant, genome_build, deadline)
+    if not validation_result:
+        # The search has already started, so Future.cancel() would be a no-op; tell it to stop instead
+        clinvar_cancelled.set()
+        logger.error("Validation failed for '%s'", hgvs_variant)
+        return None
+    logger.info("Validation successful for '%s'", hgvs_variant)
 
-def main():
+    clinvar_results, clinvar_error = clinvar_future.result()
+    return _build_result(hgvs_variant, genome_build, validation_result, clinvar_results, clinvar_error)
+
+
+def _build_result(hgvs_variant, genome_build, validation_result, clinvar_results, clinvar_error=None):
+    """Assembles the run_pipeline() result from a validated variant and its ClinVar search outcome."""
+    # Step 2: Extract gene symbol from VV response
+    gene_symbol = extract_gene_symbol(validation_result)
+    if not gene_symbol:
+        logger.warning("No gene symbol found for '%s'", hgvs_variant)
+
+    # Step 3: Extract classifications from the ClinVar results for the validated variant
+    classifications = None
+    # Check if ClinVar returned valid results
+    if clinvar_results and 'result' in clinvar_results and clinvar_results['result'] and 'uids' in clinvar_results[
+        'result']:
+        # Extract the first UID and its data
+        result_uid = clinvar_results['result']['uids'][0]
+        result_data = clinvar_results['result'].get(result_uid, {})
+        logger.debug("ClinVar result UID: %s, Data: %r", result_uid, result_data)
+
+        # Extract classifications from the result data
+        classifications = extract_classifications(result_data, result_uid)
+        if classifications is None:
+            logger.error("Failed to extract classifications for '%s'", hgvs_variant)
+    else:
+        clinvar_results = None
+        if clinvar_error is None:
+            logger.warning("Validation passed, but ClinVar returned no data for '%s'", hgvs_variant)
+
+    return {
+        'variant': hgvs_variant,
+        'genome_build': genome_build,
+        'gene_symbol': gene_symbol,
+        'clinvar_results': clinvar_results,
+        'classifications': classifications,
+        'clinvar_error': clinvar_error
+    }
+
+
+def _clinvar_error_message(hgvs_variant, error):
+    """Returns the message print_report() shows when the ClinVar search failed with error."""
+    # Timeout and JSONDecodeError are checked first: they are subclasses of the broader types
+    if isinstance(error, Timeout):
+        return f"Request timed out for HGVS variant: {hgvs_variant}"
+    if isinstance(error, orjson.JSONDecodeError):
+        return f"Error decoding JSON response for HGVS variant '{hgvs_variant}': {error}"
+    if isinstance(error, RequestException):
+        return f"Error during ClinVar API request for HGVS variant '{hgvs_variant}': {error}"
+    return f"An unexpected error occurred while searching ClinVar: {error}"
+
+
+def print_report(hgvs_variant, genome_build, result, debug=False):
+    """Prints the outcome of run_pipeline() for one variant."""
+    # Check if validation failed
+    if result is None:
+        print(f"Error: The entered variant '{hgvs_variant}' is not valid according to VariantValidator.")
+        return
+
+    # Inform user of successful validation
+    print(f"HGVS variant '{hgvs_variant}' validated successfully for {genome_build}. Proceeding to ClinVar search...")
+    gene_symbol = result['gene_symbol']
+    if not gene_symbol:
+        print("Gene Symbol: Not available — the variant may be intronic or unrecognized by transcript")
+    else:
+        print(f"Gene Symbol: {gene_symbol}")
+
+    # A failed search is not the same as "not in ClinVar", so say which it was
+    if result.get('clinvar_error') is not None:
+        print(_clinvar_error_message(hgvs_variant, result['clinvar_error']))
+        return
+
+    if debug:
+        write_debug_json("Raw ClinVar results:", result['clinvar_results'])
+
+    if result['clinvar_results'] is None:
+        # Inform user if no ClinVar results were found
+        print(f"No results found for HGVS variant '{hgvs_variant}' in ClinVar.")
+        if not gene_symbol:
+            print("This variant may not be clinically annotated yet.")
+        return
+
+    classifications = result['classifications']
+    if classifications is None:
+        print("Error: Failed to extract classifications from ClinVar data.")
+        return
+    if debug:
+        write_debug_json("Extracted classifications:", classifications._asdict())
+    # Step 4: Format output
+    result_summary = format_results(gene_symbol or "N/A", classifications)
+    # Display final output
+    pretty_print_results(result_summary)
+    logger.info("Successfully displayed ClinVar results for '%s'", hgvs_variant)
+
+
+def run_batch(variants, genome_build, debug=False):
+    """
+    Looks up many variants and prints the reports in input order.
+
+    Rather than running the pipeline once per variant, the whole batch goes through
+    validate_many() and search_clinvar_many(), so the ClinVar summaries are fetched
+    with one batched eSummary request; the two run concurrently, as in run_pipeline().
+    Lines that fail check_inputs() are reported as input errors without aborting the batch.
+
+    The whole batch shares one deadline of TOTAL_BUDGET_S per round of BATCH_WORKERS
+    variants, so a degraded upstream fails the remaining lookups instead of hanging the run.
+    """
+    logger.info("Batch processing %s HGVS variants for %s", len(variants), genome_build)
+
+    input_errors = {}
+    for index, hgvs_variant in enumerate(variants):
+        try:
+            check_inputs(hgvs_variant, genome_build)
+        except ValueError as e:
+            # Report bad lines without aborting the rest of the batch
+            logger.error("Input error for '%s': %s", hgvs_variant, e)
+            input_errors[index] = e
+    valid = [v for index, v in enumerate(variants) if index not in input_errors]
+
+    # The batched eSummary cannot be split into per-variant budgets, so bound the batch as a whole
+    deadline = time.monotonic() + TOTAL_BUDGET_S * math.ceil(len(valid) / BATCH_WORKERS)
+
+    # The work is network-bound and shares one session, cache and rate limiter, so threads
+    # (not processes) overlap the round trips
+    executor = ThreadPoolExecutor(max_workers=1)
+    clinvar_future = submit_in_context(executor, search_clinvar_many, valid, max_workers=BATCH_WORKERS,
+                                       return_exceptions=True, deadline=deadline)
+    executor.shutdown(wait=False)
+    validation_results = validate_many(valid, genome_build, max_workers=BATCH_WORKERS, deadline=deadline)
+    clinvar_outcomes = clinvar_future.result()
+
+    outcomes = iter(zip(valid, validation_results, clinvar_outcomes))
+    for index, hgvs_variant in enumerate(variants):
+        print(f"\n=== {hgvs_variant} ===")
+        if index in input_errors:
+            print(f"Input error: {input_errors[index]}")
+            continue
+        _, validation_result, clinvar_outcome = next(outcomes)
+        result = None
+        if validation_result:
+            # search_clinvar_many() reports a failed search as its exception
+            clinvar_error = clinvar_outcome if isinstance(clinvar_outcome, Exception) else None
+            clinvar_results = None if clinvar_error is not None else clinvar_outcome
+            with bind_variant(hgvs_variant):
+                result = _build_result(hgvs_variant, genome_build, validation_result,
+                                       clinvar_results, clinvar_error)
+        print_report(hgvs_variant, genome_build, result, debug)
+
+
+def main(argv=None):
     """Main function to validate an HGVS variant and fetch ClinVar data.
-    The user input as a HGVS variant and genome assembly build (GRCh38/GRCh37)"""
+    The user input as a HGVS variant and genome assembly build (GRCh38/GRCh37),
+    or with --batch FILE, every variant listed in FILE."""
+    args = parse_args(argv)
+    configure_logging()
     # Log the start of the program
     logger.info("Starting ClinVar search program")
     try:
-        # Prompt user for HGVS variant and remove whitespace
-        hgvs_variant = input("Enter the HGVS variant (e.g., NM_000518.5:c.92+1G>A): ").strip()
-        # Prompt user for genome build and convert to uppercase
-        genome_build = input("Enter the genome build (GRCh38 or GRCh37): ").strip().upper()
-        logger.info(f"User input - HGVS variant: '{hgvs_variant}', Genome build: '{genome_build}'")
-
-        # Validate user inputs
-        if not hgvs_variant:
-            logger.error("No HGVS variant provided")
-            raise ValueError("No HGVS variant provided")
-        if genome_build not in ["GRCH38", "GRCH37"]:
-            logger.error(f"Invalid genome build: {genome_build}")
-            raise ValueError("Genome build must be GRCh38 or GRCh37")
-
-        # Step 1: Validate the HGVS variant using VariantValidator
-        validation_result = validate_hgvs_variant(hgvs_variant, genome_build)
-
-        # Check if validation failed
-        if not validation_result:
-            logger.error(f"Validation failed for '{hgvs_variant}'")
-            print(f"Error: The entered variant '{hgvs_variant}' is not valid according to VariantValidator.")
-            return
-
-        # Log and inform user of successful validation
-        logger.info(f"Validation successful for '{hgvs_variant}'")
-        print(
-            f"HGVS variant '{hgvs_variant}' validated successfully for {genome_build}. Proceeding to ClinVar search...")
-
-        # Step 2: Extract gene symbol from VV response
-        gene_symbol = extract_gene_symbol(validation_result)
-        if not gene_symbol:
-            logger.warning(f"No gene symbol found for '{hgvs_variant}'")
-            print("Gene Symbol: Not available — the variant may be intronic or unrecognized by transcript")
-            gene_symbol = "N/A"
-            gene_missing = True
+        if args.batch:
+            variants = read_batch_file(args.batch)
         else:
-            print(f"Gene Symbol: {gene_symbol}")
-            gene_missing = False
-
-        # Step 3: Query ClinVar with the validated variant
-        clinvar_results = search_clinvar_by_hgvs(hgvs_variant)
-
-        print("\nRaw ClinVar results:")
-        import pprint
-        #pprint.pprint(clinvar_results)
-
-        # Check if ClinVar returned valid results
-        if clinvar_results and 'result' in clinvar_results and clinvar_results['result'] and 'uids' in clinvar_results[
-            'result']:
-            # Extract the first UID and its data
-            result_uid = clinvar_results['result']['uids'][0]
-            result_data = clinvar_results['result'].get(result_uid, {})
-            logger.debug(f"ClinVar result UID: {result_uid}, Data: {result_data}")
-
-            # Extract classifications from the result data
-            classifications = extract_classifications(result_data, result_uid)
-            print("\nExtracted classifications:")
-            import pprint
-            #pprint.pprint(classifications)
-
-            if classifications is None:
-                logger.error(f"Failed to extract classifications for '{hgvs_variant}'")
-                print("Error: Failed to extract classifications from ClinVar data.")
-                return
-            # Step 4: Format output
-            result_summary = format_results(gene_symbol, classifications)
-            # Display final output
-            pretty_print_results(result_summary)
-
-            logger.info(f"Successfully displayed ClinVar results for '{hgvs_variant}'")
+            # Prompt user for HGVS variant and remove whitespace
+            hgvs_variant = input("Enter the HGVS variant (e.g., NM_000518.5:c.92+1G>A): ").strip()
+        # Prompt user for genome build (unless given) and convert to uppercase
+        genome_build = args.genome_build or input("Enter the genome build (GRCh38 or GRCh37): ")
+        genome_build = genome_build.strip().upper()
+
+        if args.batch:
+            if genome_build not in ["GRCH38", "GRCH37"]:
+                logger.error("Invalid genome build: %s", genome_build)
+                raise ValueError("Genome build must be GRCh38 or GRCh37")
+            run_batch(variants, genome_build, args.debug)
         else:
-            # Inform user if no ClinVar results were found
-            logger.warning(f"Validation passed, but ClinVar returned no data for '{hgvs_variant}'")
-            print(f"No results found for HGVS variant '{hgvs_variant}' in ClinVar.")
-            if gene_missing:
-                print("This variant may not be clinically annotated yet.")
-
-    except ValueError as e:
-        # Handle input validation errors
-        logger.error(f"Input error: {e}")
+            logger.info("User input - HGVS variant: '%s', Genome build: '%s'", hgvs_variant, genome_build)
+            result = run_pipeline(hgvs_variant, genome_build)
+            print_report(hgvs_variant, genome_build, result, args.debug)
+
+    except (OSError, ValueError) as e:
+        # Handle input validation errors and unreadable batch files
+        logger.error("Input error: %s", e)
         print(f"Input error: {e}")
     except KeyboardInterrupt:
         # Handle user termination (e.g., Ctrl+C)
@@ -133,12 +382,14 @@ def main():
         print("\nProgram terminated by user.")
     except Exception as e:
         # Handle unexpected errors in main execution
-        logger.error(f"Unexpected error in main: {e}", exc_info=True)
+        logger.error("Unexpected error in main: %s", e, exc_info=True)
         print(f"An unexpected error occurred: {e}")
     finally:
+        # Pooled HTTP connections are released by session.close_session() at interpreter exit,
+        # which runs only after cancelled background lookups have finished with the session
         # Log the end of the program execution
         logger.info("ClinVar search program completed")
 
 if __name__ == "__main__":
     # Run the main function if the script is executed directly
-    main()
\ No newline at end of file
+    main()
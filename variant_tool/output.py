@@ -8,6 +8,14 @@ This module handles:
 Includes handling of standard and warning variant validation responses.
 """
 
+import sys  # Write the report to stdout in one call
+
+# Fixed report lines, built once
+_REPORT_HEADER = "\nClinical Variant Summary\n" + "=" * 40 + "\n"
+_SECTION_HEADER = ("  Field                    Value\n"
+                   "  ------------------------- ------------------------------------------------------------\n")
+
+
 def extract_gene_symbol(validation_result):
     """
     Attempts to extract gene symbol from validation result.
@@ -19,38 +27,35 @@ def extract_gene_symbol(validation_result):
         str: Extracted gene symbol or None
     """
     try:
-        # If standard format
-        for k in validation_result:
-            record = validation_result[k]
-            if isinstance(record, dict) and 'gene_symbol' in record:
-                return record['gene_symbol']
-        # If fallback warning format
-        if 'validation_warning_1' in validation_result:
-            warning_block = validation_result['validation_warning_1']
-            if 'gene_symbol' in warning_block:
-                return warning_block['gene_symbol']
-    except Exception:
+        # Fast path: fallback warning format, a single direct lookup
+        warning_block = validation_result.get('validation_warning_1')
+        if isinstance(warning_block, dict) and warning_block.get('gene_symbol'):
+            return warning_block['gene_symbol']
+        # Standard format: first record carrying a gene symbol, stopping at the first match
+        return next((record['gene_symbol'] for record in validation_result.values()
+                     if isinstance(record, dict) and record.get('gene_symbol')), None)
+    except AttributeError:
+        # Not a dict (e.g. None or a list from an unexpected response shape)
         return None
-    return None
 
 
 def format_results(gene_symbol, classifications):
     """
-    Formats gene symbol and classification dictionary into a readable structure.
+    Formats gene symbol and classifications into a readable structure.
 
     Args:
         gene_symbol (str): Symbol like "HBB"
-        classifications (dict): Output from extract_classifications
+        classifications (Classifications): Output from extract_classifications
 
     Returns:
         dict: Formatted dictionary with user-friendly keys and values
     """
     return {
         "gene": gene_symbol,
-        "variant_uid": classifications.get("uid"),
-        "germline": classifications.get("germline_classification"),
-        "clinical_impact": classifications.get("clinical_impact_classification"),
-        "oncogenicity": classifications.get("oncogenicity_classification")
+        "variant_uid": classifications.uid,
+        "germline": classifications.germline_classification,
+        "clinical_impact": classifications.clinical_impact_classification,
+        "oncogenicity": classifications.oncogenicity_classification
     }
 
 
@@ -58,27 +63,28 @@ def pretty_print_results(results):
     """
     Nicely formats and prints the result summary returned by format_results().
 
+    The whole report is assembled first and written to stdout in a single call.
+
     Args:
         results (dict): Formatted dictionary with keys like 'gene', 'germline', etc.
     """
-    print("\nClinical Variant Summary")
-    print("=" * 40)
-    print(f"Gene: {results.get('gene', 'N/A')}")
-    print(f"Variant UID: {results.get('variant_uid', 'N/A')}\n")
+    out = [_REPORT_HEADER,
+           f"Gene: {results.get('gene', 'N/A')}\n",
+           f"Variant UID: {results.get('variant_uid', 'N/A')}\n\n"]
 
     # Helper to format classification sections
-    def print_section(title, data):
-        print(f"{title}")
+    def add_section(title, data):
+        out.append(f"{title}\n")
         if not isinstance(data, dict) or not data:
-            print("  No data available.\n")
+            out.append("  No data available.\n\n")
             return
-        print("  Field                    Value")
-        print("  ------------------------- ------------------------------------------------------------")
+        out.append(_SECTION_HEADER)
         for k, v in data.items():
             label = k.replace("_", " ").capitalize()
-            print(f"  {label:<25} {v}")
-        print()
+            out.append(f"  {label:<25} {v}\n")
+        out.append("\n")
 
-    print_section("Germline Classification", results.get("germline"))
-    print_section("Clinical Impact Classification", results.get("clinical_impact"))
-    print_section("Oncogenicity Classification", results.get("oncogenicity"))
+    add_section("Germline Classification", results.get("germline"))
+    add_section("Clinical Impact Classification", results.get("clinical_impact"))
+    add_section("Oncogenicity Classification", results.get("oncogenicity"))
+    sys.stdout.write("".join(out))
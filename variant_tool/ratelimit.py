@@ -0,0 +1,65 @@
+"""
+ratelimit.py
+
+Provides a thread-safe token bucket used to keep API request rates within provider limits
+(e.g. NCBI E-utilities allows 3 requests/second, or 10 with an API key).
+
+Usage:
+    bucket = TokenBucket(3)
+    with bucket:
+        response = session.get(url)
+"""
+
+import threading  # Import threading to guard bucket state across worker threads
+import time  # Import time for the clock and sleeping
+
+
+class TokenBucket:
+    """Allows at most `rate` acquisitions per `per` seconds, with bursts up to `rate`."""
+
+    def __init__(self, rate, per=1.0, clock=time.monotonic, sleep=time.sleep):
+        """
+        Args:
+            rate (int): Number of requests allowed per period.
+            per (float): Length of the period in seconds.
+            clock (callable): Monotonic clock, injectable for testing.
+            sleep (callable): Sleep function, injectable for testing.
+        """
+        self.rate = rate
+        self.per = per
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(rate)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        """Adds the tokens earned since the last update, capped at the bucket size."""
+        elapsed = now - self._updated
+        self._tokens = min(float(self.rate), self._tokens + elapsed * self.rate / self.per)
+        self._updated = now
+
+    def acquire(self):
+        """Blocks until a token is available, then consumes it."""
+        while True:
+            with self._lock:
+                self._refill(self._clock())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                # Time until one whole token has been earned
+                wait = (1 - self._tokens) * self.per / self.rate
+            self._sleep(wait)
+
+    def drain(self):
+        """Empties the bucket so the next acquisition waits for a refill (server-side back-off)."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens = 0.0
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
@@ -0,0 +1,212 @@
+"""
+session.py
+
+Provides the single requests.Session shared by every API call in the package
+(VariantValidator and NCBI E-utilities), so keep-alive connections and the urllib3
+connection pool are reused across requests instead of paying a new TCP + TLS
+handshake per call.
+
+- SESSION: the shared, pooled session
+- close_session(): releases pooled connections (also run at interpreter exit)
+- deadline_timeout(): caps a request timeout to what is left of an end-to-end deadline
+- send_with_retries(): retries transient failures, but only while the deadline leaves room
+
+Callers can also pass a `cancelled` threading.Event: once it is set no further request
+or retry is started (one already in flight still runs to completion).
+
+Retries are done by send_with_retries() rather than by the urllib3 adapter, so every
+attempt and every wait between attempts counts against the caller's deadline.
+"""
+
+import atexit  # Close the shared session at interpreter exit
+import email.utils  # Parse HTTP-date Retry-After values
+import logging  # Import logging for retry attempts
+import random  # Jitter for retry backoff
+import socket  # TCP keepalive options for pooled connections
+import time  # Monotonic clock for end-to-end deadlines
+import requests  # Import requests for HTTP API calls
+from requests.adapters import HTTPAdapter  # Connection pooling for the shared session
+from urllib3.connection import HTTPConnection  # Default socket options to extend
+from urllib3.util import make_headers  # Accept-Encoding for the codecs urllib3 can decode
+from requests.exceptions import ConnectionError, Timeout  # Retried failures; base class for deadline failures
+
+logger = logging.getLogger(__name__)
+
+# Keep idle pooled sockets alive between requests so the OS does not drop them
+_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+if hasattr(socket, 'TCP_KEEPIDLE'):
+    _SOCKET_OPTIONS += [(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 30)]
+if hasattr(socket, 'TCP_KEEPINTVL'):
+    _SOCKET_OPTIONS += [(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10)]
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections use TCP_NODELAY and TCP keepalive."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault('socket_options', _SOCKET_OPTIONS)
+        super().init_poolmanager(*args, **kwargs)
+
+
+# Retry policy for transient failures, applied by send_with_retries(): connection errors,
+# timeouts, 429 and 5xx are retried; other 4xx responses never are
+RETRIES = 3
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_BACKOFF_FACTOR = 0.5
+_BACKOFF_JITTER = 0.5
+# Longest single wait between retries, whether from backoff or a server's Retry-After
+_MAX_RETRY_WAIT = 10
+
+
+def _build_adapter():
+    """Creates a pooled adapter; one pool per host (VariantValidator, E-utilities).
+
+    The adapter itself never retries (urllib3 would re-send with the full timeout
+    regardless of any deadline); send_with_retries() does instead."""
+    return _KeepAliveAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=0
+    )
+
+
+SESSION = requests.Session()
+SESSION.mount("https://", _build_adapter())
+SESSION.mount("http://", _build_adapter())
+SESSION.headers.update({
+    'User-Agent': "variant-tool/0.1.0",
+    'Accept': "application/json",
+    # Compressed bodies are decoded transparently by urllib3; advertises br too when brotli is installed
+    'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding'],
+    'Connection': "keep-alive",
+})
+
+
+class DeadlineExceeded(Timeout):
+    """Raised instead of sending a request once the end-to-end deadline has passed."""
+
+
+class RequestCancelled(DeadlineExceeded):
+    """Raised instead of sending a request once the caller has said it no longer needs the result."""
+
+
+def deadline_timeout(timeout, deadline=None, cancelled=None):
+    """
+    Caps a (connect, read) timeout to the time left before deadline.
+
+    Args:
+        timeout (tuple): The per-request (connect, read) timeout in seconds.
+        deadline (float): time.monotonic() value by which the whole operation must finish,
+                          or None for no deadline.
+        cancelled (threading.Event): Set by the caller once the result is no longer needed,
+                                     or None.
+
+    Returns:
+        tuple: The timeout to pass to the request.
+
+    Raises:
+        RequestCancelled: If cancelled is set.
+        DeadlineExceeded: If the deadline has already passed.
+    """
+    if cancelled is not None and cancelled.is_set():
+        raise RequestCancelled("Request cancelled by caller before sending")
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("End-to-end deadline exceeded before sending request")
+    connect, read = timeout
+    return min(connect, remaining), max(0.1, min(read, remaining))
+
+
+def _retry_after(response):
+    """Returns the wait requested by a Retry-After header in seconds, or None if absent or malformed."""
+    value = (response.headers.get('Retry-After') or '').strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def retry_wait(attempt, response=None):
+    """
+    Returns how long to wait before retrying after the given (zero-based) attempt failed.
+
+    A Retry-After header on response is honoured; otherwise the wait backs off
+    exponentially with random jitter. Either way it is capped at _MAX_RETRY_WAIT seconds,
+    so a server asking for a long pause fails the request instead of hanging the caller.
+    """
+    wait = _retry_after(response) if response is not None else None
+    if wait is None:
+        wait = _BACKOFF_FACTOR * 2 ** attempt + random.uniform(0, _BACKOFF_JITTER)
+    return min(wait, _MAX_RETRY_WAIT)
+
+
+def send_with_retries(send, timeout, deadline=None, cancelled=None):
+    """
+    Sends a request with send(timeout), retrying connection errors, timeouts, 429 and 5xx.
+
+    Up to RETRIES retries are made. Each attempt's timeout is capped to what is left of
+    deadline, and no retry is made if its wait would run past the deadline, so the whole
+    call (attempts and waits) finishes within the caller's budget. POSTs are retried too,
+    since the only ones sent are read-only E-utilities queries. Setting cancelled stops
+    any further attempt, ending a wait before a retry early.
+
+    Args:
+        send (callable): Takes a (connect, read) timeout and returns a requests.Response.
+        timeout (tuple): The per-attempt (connect, read) timeout in seconds.
+        deadline (float): time.monotonic() value by which the whole call must finish,
+                          or None for no deadline.
+        cancelled (threading.Event): Set by the caller once the result is no longer needed,
+                                     or None.
+
+    Returns:
+        requests.Response: The first response that is not retried, or the last one once
+                           retries or the deadline run out.
+
+    Raises:
+        DeadlineExceeded: If the deadline passed (RequestCancelled: the caller cancelled)
+                          before an attempt could be sent.
+        requests.exceptions.ConnectionError, requests.exceptions.Timeout: From the last attempt.
+    """
+    attempt = 0
+    while True:
+        # Raises DeadlineExceeded once nothing is left of the budget (RequestCancelled if cancelled)
+        attempt_timeout = deadline_timeout(timeout, deadline, cancelled)
+        try:
+            response = send(attempt_timeout)
+        except (ConnectionError, Timeout) as e:
+            if attempt >= RETRIES:
+                raise
+            error, response = e, None
+        else:
+            if response.status_code not in _RETRY_STATUSES or attempt >= RETRIES:
+                return response
+            error = None
+
+        wait = retry_wait(attempt, response)
+        if deadline is not None and time.monotonic() + wait >= deadline:
+            # No room left for another attempt: report how this one ended
+            logger.info("Not retrying, %.1f s wait would pass the deadline", wait)
+            if error is not None:
+                raise error
+            return response
+        logger.info("Attempt %d failed (%s), retrying in %.1f s",
+                    attempt + 1, error or f"HTTP {response.status_code}", wait)
+        if cancelled is None:
+            time.sleep(wait)
+        elif cancelled.wait(wait):
+            # The caller gave up on the result while we were backing off
+            raise RequestCancelled("Request cancelled by caller before retrying") from error
+        attempt += 1
+
+
+def close_session():
+    """Closes all pooled connections held by the shared session."""
+    SESSION.close()
+
+
+atexit.register(close_session)
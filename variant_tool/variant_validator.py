@@ -2,104 +2,287 @@
 variant_validator.py
 
 Provides functions to validate HGVS variants using the VariantValidator API.
+The RefSeq and Ensembl endpoints are queried concurrently, preferring the RefSeq result,
+and validate_many() validates a list of variants concurrently over the shared session.
 """
 
-import requests  # Import requests for HTTP API calls
-import json  # Import json for parsing API responses
+import atexit  # Close the response cache at interpreter exit
+import json  # JSONDecodeError base class (orjson's decode error subclasses it)
 import logging  # Import logging for tracking execution and errors
+import orjson  # Import orjson for fast parsing of API responses
+import threading  # Per-endpoint concurrency limits
+from collections import OrderedDict  # Ordered mapping for the in-memory result memo
+from urllib.parse import quote  # Percent-encode variants for the URL path
+from concurrent.futures import Future, ThreadPoolExecutor  # Run the RefSeq and Ensembl lookups concurrently
 from requests.exceptions import Timeout, RequestException  # Specific exceptions for requests
+from variant_tool.cache import ResponseCache  # On-disk cache for repeat validations
+from variant_tool.circuit_breaker import CircuitBreaker  # Fail fast while an endpoint is down
+from variant_tool.logcontext import bind_variant, submit_in_context  # Tag log records with the variant
+from variant_tool.session import (SESSION, DeadlineExceeded, RequestCancelled,  # Shared pooled session
+                                  deadline_timeout, send_with_retries)
 
 logger = logging.getLogger(__name__)
 
-def validate_variant_refseq(variant, genome_build):
-    """Validates an HGVS variant using VariantValidator's RefSeq endpoint."""
-    # Log the start of RefSeq validation
-    logger.info(f"Validating variant '{variant}' with RefSeq endpoint for {genome_build}")
-    # Define the base URL for VariantValidator's RefSeq API
-    base_url = "https://rest.variantvalidator.org/VariantValidator/variantvalidator"
-    # Construct the full URL with genome build and variant
-    url = f"{base_url}/{genome_build}/{variant}/all?content-type=application%2Fjson"
+# VariantValidator endpoint URLs, filled in per call with the genome build and variant
+REFSEQ_URL_TEMPLATE = ("https://rest.variantvalidator.org/VariantValidator/variantvalidator"
+                       "/{build}/{variant}/all?content-type=application%2Fjson")
+ENSEMBL_URL_TEMPLATE = ("https://rest.variantvalidator.org/VariantValidator/variantvalidator_ensembl"
+                        "/{build}/{variant}/all?content-type=application%2Fjson")
+
+# HGVS characters left readable in the URL path ('-', '_', '.', '~' are always kept); anything
+# else, e.g. '/', '?', ' ' or the brackets and ';' of allele syntax, is percent-encoded
+_VARIANT_SAFE_CHARS = ":>+"
+
+# (connect, read) timeouts, capped per call by any end-to-end deadline
+_TIMEOUT = (3.05, 10)
+
+# On-disk cache of VariantValidator responses, keyed on the request URL (variant + genome build)
+_CACHE = ResponseCache("variantvalidator_cache.sqlite")
+atexit.register(_CACHE.close)
+
+# One breaker per endpoint, so an Ensembl outage doesn't block RefSeq lookups (and vice versa)
+_REFSEQ_BREAKER = CircuitBreaker("rest.variantvalidator.org/refseq")
+_ENSEMBL_BREAKER = CircuitBreaker("rest.variantvalidator.org/ensembl")
+
+# Bulkheads: at most 4 requests in flight per endpoint, however many callers are validating;
+# excess callers wait for a free slot rather than piling onto VariantValidator
+_REFSEQ_SLOTS = threading.BoundedSemaphore(4)
+_ENSEMBL_SLOTS = threading.BoundedSemaphore(4)
+
+# In-process memo of validate_hgvs_variant() keyed on (variant, genome build). It holds
+# Futures rather than results, so concurrent duplicate lookups share one upstream call
+_MEMO = OrderedDict()
+_MEMO_LOCK = threading.Lock()
+_MEMO_SIZE = 1024
+
+# Shared workers for the concurrent RefSeq/Ensembl lookups, sized to the two bulkheads so
+# every running lookup can hold a slot; reused across calls rather than spun up per variant
+_LOOKUP_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="variant-validator")
+
+
+def _get_json(url, breaker, slots, deadline=None, cancelled=None):
+    """Sends a GET request and returns the parsed JSON body, serving repeat URLs from the cache.
+
+    Only successful responses are cached, so transient failures are retried on the next call.
+    Expired entries are revalidated with a conditional GET and reused on 304 Not Modified.
+    While the endpoint's breaker is open, uncached URLs fail fast with CircuitOpenError, and
+    once the deadline (a time.monotonic() value) has passed they fail with DeadlineExceeded.
+    Once the optional cancelled event is set, no further request or retry is sent and the
+    call fails with RequestCancelled. The request itself waits for one of the endpoint's
+    concurrency slots."""
+    entry = _CACHE.lookup(url)
+    if entry is not None and entry.fresh:
+        logger.debug("VariantValidator response served from cache: %s", url)
+        return orjson.loads(entry.body)
+    # Checked before the breaker, so a spent budget or cancelled caller neither counts as an
+    # outage nor takes (and then abandons) the half-open probe
+    deadline_timeout(_TIMEOUT, deadline, cancelled)
+    breaker.check()
+    # Send If-None-Match / If-Modified-Since for an expired entry
+    headers = entry.conditional_headers() if entry else None
+
+    def send(timeout):
+        # Every attempt, retries included, waits for one of the endpoint's slots
+        with slots:
+            return SESSION.get(url, timeout=timeout, headers=headers)
+
     try:
-        # Send GET request with a 10-second timeout to avoid hanging
-        response = requests.get(url, timeout=10)
+        # Transient failures are retried, but only as long as the deadline leaves room
+        response = send_with_retries(send, _TIMEOUT, deadline, cancelled)
         # Raise an exception if the HTTP status indicates an error (e.g., 404, 500)
         response.raise_for_status()
-        # Parse and return the JSON response
-        validation_data = response.json()
-        logger.info(f"Successfully validated '{variant}' with RefSeq endpoint")
+    except DeadlineExceeded:
+        # Out of budget or cancelled before the next attempt: says nothing about the endpoint
+        raise
+    except RequestException as e:
+        breaker.record_result(e)
+        raise
+    breaker.record_success()
+    if response.status_code == 304 and entry is not None:
+        # Unchanged on the server: skip the body transfer and reuse the cached copy
+        logger.debug("VariantValidator response revalidated: %s", url)
+        _CACHE.revalidated(url)
+        return orjson.loads(entry.body)
+    # Parse the raw body with orjson rather than response.json() (no intermediate str decode)
+    validation_data = orjson.loads(response.content)
+    _CACHE.store_response(url, response)
+    return validation_data
+
+
+def validate_variant_refseq(variant, genome_build, deadline=None, cancelled=None):
+    """Validates an HGVS variant using VariantValidator's RefSeq endpoint.
+
+    deadline is an optional time.monotonic() value bounding the request, and cancelled an
+    optional threading.Event the caller sets once it no longer needs the result."""
+    # Log the start of RefSeq validation
+    logger.info("Validating variant '%s' with RefSeq endpoint for %s", variant, genome_build)
+    # Construct the full URL with genome build and percent-encoded variant
+    url = REFSEQ_URL_TEMPLATE.format(build=genome_build, variant=quote(variant, safe=_VARIANT_SAFE_CHARS))
+    try:
+        # Send GET request with a bounded timeout to avoid hanging (or reuse a cached response)
+        validation_data = _get_json(url, _REFSEQ_BREAKER, _REFSEQ_SLOTS, deadline, cancelled)
+        logger.info("Successfully validated '%s' with RefSeq endpoint", variant)
         return validation_data
-    except Timeout:
-        # Handle timeout specifically
-        logger.error(f"Timeout after 10 seconds validating '{variant}' with RefSeq endpoint")
+    except RequestCancelled:
+        # The caller no longer needs this result; not an error
+        logger.info("RefSeq validation of '%s' cancelled by caller", variant)
+        return None
+    except Timeout as e:
+        # Handle timeout (or an exhausted deadline) specifically
+        logger.error("Timeout validating '%s' with RefSeq endpoint: %s", variant, e)
         return None
     except RequestException as e:
         # Handle other HTTP-related errors
-        logger.error(f"HTTP error validating '{variant}' with RefSeq: {e}")
+        logger.error("HTTP error validating '%s' with RefSeq: %s", variant, e)
         return None
     except json.JSONDecodeError as e:
         # Handle JSON parsing errors
-        logger.error(f"JSON decode error for RefSeq response of '{variant}': {e}")
+        logger.error("JSON decode error for RefSeq response of '%s': %s", variant, e)
         return None
     except Exception as e:
         # Catch any unexpected errors during validation
-        logger.error(f"Unexpected error validating '{variant}' with RefSeq: {e}")
+        logger.error("Unexpected error validating '%s' with RefSeq: %s", variant, e)
         return None
 
 
-def validate_variant_ensembl(variant, genome_build):
-    """Validates an HGVS variant using VariantValidator's Ensembl endpoint."""
+def validate_variant_ensembl(variant, genome_build, deadline=None, cancelled=None):
+    """Validates an HGVS variant using VariantValidator's Ensembl endpoint.
+
+    deadline is an optional time.monotonic() value bounding the request, and cancelled an
+    optional threading.Event the caller sets once it no longer needs the result."""
     # Log the start of Ensembl validation
-    logger.info(f"Validating variant '{variant}' with Ensembl endpoint for {genome_build}")
-    # Define the base URL for VariantValidator's Ensembl API
-    base_url = "https://rest.variantvalidator.org/VariantValidator/variantvalidator_ensembl"
-    # Construct the full URL with genome build and variant
-    url = f"{base_url}/{genome_build}/{variant}/all?content-type=application%2Fjson"
+    logger.info("Validating variant '%s' with Ensembl endpoint for %s", variant, genome_build)
+    # Construct the full URL with genome build and percent-encoded variant
+    url = ENSEMBL_URL_TEMPLATE.format(build=genome_build, variant=quote(variant, safe=_VARIANT_SAFE_CHARS))
     try:
-        # Send GET request with a 10-second timeout
-        response = requests.get(url, timeout=10)
-        # Raise an exception for HTTP errors
-        response.raise_for_status()
-        # Parse and return the JSON response
-        validation_data = response.json()
-        logger.info(f"Successfully validated '{variant}' with Ensembl endpoint")
+        # Send GET request with a bounded timeout (or reuse a cached response)
+        validation_data = _get_json(url, _ENSEMBL_BREAKER, _ENSEMBL_SLOTS, deadline, cancelled)
+        logger.info("Successfully validated '%s' with Ensembl endpoint", variant)
         return validation_data
-    except Timeout:
-        # Handle timeout specifically
-        logger.error(f"Timeout after 10 seconds validating '{variant}' with Ensembl endpoint")
+    except RequestCancelled:
+        # The caller no longer needs this result; not an error
+        logger.info("Ensembl validation of '%s' cancelled by caller", variant)
+        return None
+    except Timeout as e:
+        # Handle timeout (or an exhausted deadline) specifically
+        logger.error("Timeout validating '%s' with Ensembl endpoint: %s", variant, e)
         return None
     except RequestException as e:
         # Handle other HTTP-related errors
-        logger.error(f"HTTP error validating '{variant}' with Ensembl: {e}")
+        logger.error("HTTP error validating '%s' with Ensembl: %s", variant, e)
         return None
     except json.JSONDecodeError as e:
         # Handle JSON parsing errors
-        logger.error(f"JSON decode error for Ensembl response of '{variant}': {e}")
+        logger.error("JSON decode error for Ensembl response of '%s': %s", variant, e)
         return None
     except Exception as e:
         # Catch any unexpected errors during validation
-        logger.error(f"Unexpected error validating '{variant}' with Ensembl: {e}")
+        logger.error("Unexpected error validating '%s' with Ensembl: %s", variant, e)
         return None
 
 
-def validate_hgvs_variant(variant, genome_build):
-    """Validates an HGVS variant using RefSeq first, then falls back to Ensembl if RefSeq fails."""
+def _is_valid(validation_result):
+    """Returns True if a VariantValidator response validated the variant without an error flag."""
+    return bool(validation_result) and 'flag' in validation_result and validation_result['flag'] != 'error'
+
+
+def validate_hgvs_variant(variant, genome_build, deadline=None):
+    """Validates an HGVS variant using RefSeq first, then falls back to Ensembl if RefSeq fails.
+
+    Both endpoints are queried concurrently so a RefSeq failure costs no extra round trip;
+    the RefSeq result is still preferred whenever it is valid. An optional deadline
+    (a time.monotonic() value) bounds both lookups.
+
+    Results are memoized per (variant, genome_build) for the life of the process, and a
+    call made while the same lookup is already running waits for it instead of repeating
+    it. Failed validations (None) are not memoized. The returned dict is shared between
+    callers and must not be modified."""
+    key = (variant, genome_build)
+    with _MEMO_LOCK:
+        future = _MEMO.get(key)
+        owner = future is None
+        if owner:
+            future = _MEMO[key] = Future()
+            while len(_MEMO) > _MEMO_SIZE:
+                _MEMO.popitem(last=False)
+        else:
+            _MEMO.move_to_end(key)
+    if not owner:
+        logger.debug("Validation of '%s' with %s served from memo", variant, genome_build)
+        return future.result()
+
+    try:
+        with bind_variant(variant):
+            validation_result = _validate_hgvs_variant(variant, genome_build, deadline)
+    except BaseException as e:
+        with _MEMO_LOCK:
+            _MEMO.pop(key, None)
+        future.set_exception(e)
+        raise
+    if validation_result is None:
+        # Let the next call retry instead of memoizing the failure
+        with _MEMO_LOCK:
+            _MEMO.pop(key, None)
+    future.set_result(validation_result)
+    return validation_result
+
+
+def _validate_hgvs_variant(variant, genome_build, deadline):
+    """Runs the concurrent RefSeq/Ensembl lookup behind validate_hgvs_variant()."""
     # Log the start of the validation process
-    logger.info(f"Starting validation for HGVS variant '{variant}' with {genome_build}")
-    # Try RefSeq validation first
-    validation_result = validate_variant_refseq(variant, genome_build)
-    # Check if RefSeq validation succeeded and variant is not flagged as an error
-    if validation_result and 'flag' in validation_result and validation_result['flag'] != 'error':
-        logger.info(f"Variant '{variant}' validated successfully as RefSeq")
-        return validation_result
-
-    # If RefSeq fails or flags an error, try Ensembl
-    logger.info(f"RefSeq validation failed or invalid, attempting Ensembl for '{variant}'")
-    validation_result = validate_variant_ensembl(variant, genome_build)
-    # Check if Ensembl validation succeeded and variant is not flagged as an error
-    if validation_result and 'flag' in validation_result and validation_result['flag'] != 'error':
-        logger.info(f"Variant '{variant}' validated successfully as Ensembl")
-        return validation_result
+    logger.info("Starting validation for HGVS variant '%s' with %s", variant, genome_build)
+    # Start both lookups at once; the Ensembl one is only used if RefSeq fails. They run in
+    # copies of this context so their log records keep the caller's bound variant
+    refseq_future = submit_in_context(_LOOKUP_EXECUTOR, validate_variant_refseq, variant, genome_build, deadline)
+    ensembl_cancelled = threading.Event()
+    ensembl_future = submit_in_context(_LOOKUP_EXECUTOR, validate_variant_ensembl, variant, genome_build, deadline,
+                                       cancelled=ensembl_cancelled)
+    try:
+        # Check if RefSeq validation succeeded and variant is not flagged as an error
+        validation_result = refseq_future.result()
+        if _is_valid(validation_result):
+            logger.info("Variant '%s' validated successfully as RefSeq", variant)
+            return validation_result
+
+        # If RefSeq fails or flags an error, use the Ensembl result
+        logger.info("RefSeq validation failed or invalid, using Ensembl result for '%s'", variant)
+        validation_result = ensembl_future.result()
+        # Check if Ensembl validation succeeded and variant is not flagged as an error
+        if _is_valid(validation_result):
+            logger.info("Variant '%s' validated successfully as Ensembl", variant)
+            return validation_result
+    finally:
+        # The Ensembl result is no longer needed: drop the lookup if it is still queued, and
+        # tell a running one to send no further request or retry. A request already in
+        # flight still runs to completion (bounded by the deadline) and is discarded
+        ensembl_cancelled.set()
+        ensembl_future.cancel()
 
     # Log failure if neither endpoint validates the variant
-    logger.warning(f"Variant '{variant}' could not be validated by RefSeq or Ensembl")
-    return None
\ No newline at end of file
+    logger.warning("Variant '%s' could not be validated by RefSeq or Ensembl", variant)
+    return None
+
+
+def validate_many(variants, genome_build, max_workers=8, deadline=None):
+    """
+    Validates several HGVS variants concurrently.
+
+    Each variant goes through validate_hgvs_variant() on a worker thread; the shared
+    session, cache and per-endpoint bulkheads keep the load on VariantValidator bounded.
+
+    Args:
+        variants (list[str]): HGVS variant strings to validate.
+        genome_build (str): Genome build used for every variant (e.g., 'GRCh38').
+        max_workers (int): Maximum number of variants validated at once.
+        deadline (float): Optional time.monotonic() value bounding every request.
+
+    Returns:
+        list: One entry per input variant, in input order, each being the value
+              validate_hgvs_variant() returns for that variant.
+    """
+    logger.info("Validating %s HGVS variants with %s", len(variants), genome_build)
+    if not variants:
+        return []
+    # The lookups are network-bound, so threads overlap the round trips
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda v: validate_hgvs_variant(v, genome_build, deadline), variants))